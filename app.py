@@ -1,18 +1,39 @@
 import os
+import io
 import json
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, session, jsonify
+import click
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError as FutureTimeout, wait
+from datetime import datetime
+from flask import (Flask, render_template, request, redirect, url_for, flash, send_file, session, jsonify, g,
+                   Response, stream_with_context)
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import defer
 
 # Import project-specific modules
+import metrics
 from config import Config
-from database import db, User, History
-from ml_logic import calculate_ats_score
-from utils import extract_text_from_pdf, save_upload, generate_resume_pdf
+from database import (db, User, History, ResumeVector, ResumeSignature, BatchWriter, WriterBusy,
+                      configure_sqlite, ensure_schema)
+from report_codec import encode_report, encode_text
+from ml_logic import (analyze_document, calculate_ats_score, calculate_ats_scores_batch, registry,
+                      warm_up, get_jd_features, scoring_version, skill_matcher, clean_text)
+from search_index import ResumeIndex, vector_row
+from near_duplicates import MinHasher, NearDuplicateIndex, is_empty, resume_scope, signature_row
+from cache import LRUCache, SQLiteStore
+from utils import (PDFExtractionError, extract_text_cached, read_upload, iter_zip_pdfs, render_resume_cached,
+                   pdf_text_cache, resume_render_cache)
+from jobs import JobQueue, QueueFull, analyze_pdf, rescore_rows, scan_features
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+metrics.enabled = app.config['METRICS_ENABLED']
+
 # Initialize Plugins
 db.init_app(app)
 login_manager = LoginManager(app)
@@ -22,9 +43,122 @@ login_manager.login_view = 'login'
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-# Ensure upload folder exists
-if not os.path.exists(app.config['UPLOAD_FOLDER']):
-    os.makedirs(app.config['UPLOAD_FOLDER'])
+# Load the ML artifacts once at import time. With `gunicorn --preload` this runs in the
+# master process, so every forked worker shares the loaded model pages copy-on-write.
+# The registry reads its paths, format and reload interval from Config.
+try:
+    warm_up()
+except Exception as e:
+    app.logger.warning(f"Model warm-up failed, will retry on first request: {e}")
+
+# Local process pool for asynchronous analysis jobs; job records go to cache.db,
+# because the worker polled for a job is often not the one that queued it
+job_queue = JobQueue(workers=app.config['JOB_WORKERS'],
+                     max_pending=app.config['JOB_QUEUE_SIZE'],
+                     result_ttl=app.config['JOB_RESULT_TTL'],
+                     store=SQLiteStore(app.config['CACHE_DB_PATH'], 'jobs', max_rows=app.config['JOB_STORE_ROWS']))
+
+with app.app_context():
+    configure_sqlite(db.engine, app.config['SQLITE_SYNCHRONOUS'], app.config['SQLITE_BUSY_TIMEOUT_MS'])
+    ensure_schema()
+
+# History rows are inserted by one background thread per worker in batched transactions
+history_writer = BatchWriter(app, batch_size=app.config['HISTORY_WRITE_BATCH'],
+                             flush_interval=app.config['HISTORY_FLUSH_INTERVAL'],
+                             max_pending=app.config['HISTORY_WRITE_QUEUE'])
+
+# Top-k retrieval over every analysed resume (synced from the resume_vector table)
+resume_index = None
+
+def get_resume_index():
+    global resume_index
+    model, tfidf = registry.get()
+    model_version = registry.fingerprint[:16]
+    # HashingVectorizer (streaming trainer) has no vocabulary_, only n_features
+    n_features = len(tfidf.vocabulary_) if hasattr(tfidf, 'vocabulary_') else tfidf.n_features
+    index = resume_index
+    if index is None or index.model_version != model_version or index.n_features != n_features:
+        # A reloaded vectorizer may have another vocabulary size: rebuild rather than reset
+        index = resume_index = ResumeIndex(n_features, skill_matcher.skills)
+    index.sync(db.session, model_version)
+    return index, tfidf
+
+# Near-duplicate detection: MinHash signatures of every analysed resume behind an LSH
+# index (synced from the resume_signature table), scoped per user, JD and model
+minhasher = MinHasher()
+duplicate_index = NearDuplicateIndex()
+
+def duplicate_scope(user_id, jd_text):
+    registry.get()  # raises while no model is loaded (fingerprint is still None then)
+    return resume_scope(user_id, jd_text, registry.fingerprint[:16])
+
+def find_near_duplicate(user_id, jd_text, signature):
+    """(History, similarity) of the user's closest earlier scan for the same JD, or (None, similarity)."""
+    if is_empty(signature):
+        return None, 0.0
+    duplicate_index.sync(db.session)
+    history_id, sim = duplicate_index.best_match(db.session, signature, duplicate_scope(user_id, jd_text))
+    if history_id is None or sim < app.config['DUPLICATE_THRESHOLD']:
+        return None, sim
+    return db.session.get(History, history_id), sim
+
+# Server-side report store: the History table is the durable copy, this LRU keeps the
+# decoded dicts of recently viewed reports. The session cookie only carries the id.
+report_cache = LRUCache(app.config['REPORT_CACHE_ENTRIES'], max_bytes=app.config['REPORT_CACHE_BYTES'],
+                        sizeof=lambda item: item[2])
+
+def remember_report(report_id, user_id, results):
+    report_cache.put(report_id, (user_id, results, len(json.dumps(results))))
+    session['last_report_id'] = report_id
+    session.pop('last_results', None)  # drop the full copy kept by older cookies
+
+def load_report(report_id, user_id):
+    item = report_cache.get(report_id)
+    if item is None:
+        entry = db.session.get(History, report_id)
+        if entry is None:
+            return None
+        item = (entry.user_id, entry.get_report())
+        report_cache.put(report_id, item + (len(json.dumps(item[1])),))
+    return item[1] if item[0] == user_id else None
+
+# --- 0. INSTRUMENTATION ---
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_timings(response):
+    if metrics.enabled and 'request_started' in g:
+        elapsed = time.perf_counter() - g.request_started
+        metrics.observe('ats_request_seconds', elapsed, endpoint=request.endpoint or 'unknown')
+        header = metrics.server_timing_header()
+        total = f'total;dur={elapsed * 1000:.2f}'
+        response.headers['Server-Timing'] = f'{header}, {total}' if header else total
+    return response
+
+@metrics.register_collector
+def cache_gauges():
+    mem = pdf_text_cache.memory
+    gauges = [('ats_cache_entries', {'cache': 'pdf_text'}, len(mem)),
+              ('ats_cache_bytes', {'cache': 'pdf_text'}, mem.nbytes),
+              ('ats_cache_entries', {'cache': 'resume_render'}, len(resume_render_cache)),
+              ('ats_cache_bytes', {'cache': 'resume_render'}, resume_render_cache.nbytes),
+              ('ats_cache_entries', {'cache': 'report'}, len(report_cache)),
+              ('ats_cache_bytes', {'cache': 'report'}, report_cache.nbytes),
+              ('ats_job_queue_pending', {}, job_queue.stats()['pending']),
+              ('ats_duplicate_index_documents', {}, len(duplicate_index)),
+              ('ats_history_writer_pending', {}, history_writer.pending())]
+    if resume_index is not None:
+        gauges.append(('ats_search_index_documents', {}, len(resume_index)))
+    return gauges
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.enabled:
+        return "Metrics are disabled.", 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # --- 1. AUTHENTICATION ---
 
@@ -69,18 +203,47 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    user_history = History.query.filter_by(user_id=current_user.id).order_by(History.date.desc()).all()
-    latest = History.query.filter_by(user_id=current_user.id).order_by(History.date.desc()).first()
+    mine = History.user_id == current_user.id
+    latest_score = (select(History.score).where(mine)
+                    .order_by(History.date.desc(), History.id.desc()).limit(1).scalar_subquery())
+    total_scans, latest = db.session.query(func.count(History.id), latest_score).filter(mine).one()
+
+    recent = (History.query.options(defer(History.full_report_json), defer(History.report_blob)).filter(mine)
+              .order_by(History.date.desc(), History.id.desc()).limit(5).all())
     return render_template('dashboard.html', 
-                           history=user_history[:5], 
-                           total_scans=len(user_history),
-                           latest_score=latest.score if latest else 0)
+                           history=recent, 
+                           total_scans=total_scans,
+                           latest_score=latest if latest is not None else 0)
+
+def parse_cursor(cursor):
+    # cursor = "<iso date>_<id>" of the last row on the previous page
+    try:
+        date_part, id_part = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (AttributeError, ValueError):
+        return None
 
 @app.route('/history')
 @login_required
 def history():
-    all_history = History.query.filter_by(user_id=current_user.id).order_by(History.date.desc()).all()
-    return render_template('history.html', history=all_history)
+    page_size = app.config['HISTORY_PAGE_SIZE']
+    query = (History.query.options(defer(History.full_report_json), defer(History.report_blob))
+             .filter(History.user_id == current_user.id))
+
+    # Keyset pagination: seek past the last (date, id) seen instead of OFFSET
+    cursor = parse_cursor(request.args.get('before'))
+    if cursor:
+        last_date, last_id = cursor
+        query = query.filter(or_(History.date < last_date,
+                                 and_(History.date == last_date, History.id < last_id)))
+
+    rows = query.order_by(History.date.desc(), History.id.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = f"{rows[-1].date.isoformat()}_{rows[-1].id}"
+    return render_template('history.html', history=rows, next_cursor=next_cursor,
+                           is_first_page=cursor is None)
 
 @app.route('/delete-history/<int:id>', methods=['POST'])
 @login_required
@@ -89,6 +252,7 @@ def delete_history(id):
     if entry.user_id == current_user.id:
         db.session.delete(entry)
         db.session.commit()
+        report_cache.pop(id)
         flash("Record deleted successfully.", "success")
     return redirect(url_for('history'))
 
@@ -99,34 +263,267 @@ def delete_history(id):
 def analyze():
     return render_template('analyze.html')
 
+NO_TEXT_MESSAGE = "No text could be extracted from this PDF."
+
+def queue_analysis(user_id, jd_text, results, features=None, duplicate=None):
+    """Hands a scan to the background writer; returns a Future of its report id, set once committed.
+
+    `features` is the jobs.scan_features of the resume, computed by the caller
+    (a pool worker for async and bulk scans). `duplicate` is the (previous
+    History or None, similarity) of a near-duplicate check already run for it.
+    """
+    if features is not None:
+        if duplicate is None:
+            duplicate = find_near_duplicate(user_id, jd_text, features["signature"])
+        previous, sim = duplicate
+        if previous is not None:
+            # Flag re-uploads of (almost) the same resume so clients can diff the two reports
+            results['near_duplicate'] = {"report_id": previous.id, "similarity": round(sim, 3),
+                                         "previous_score": previous.score}
+        scope = resume_scope(user_id, jd_text, features["model_version"])
+    report_blob = encode_report(results)
+    # The inputs are stored too, so `flask rescore` can re-score this scan after a model change
+    resume_blob = features["resume_blob"] if features is not None else None
+    jd_blob = encode_text(jd_text) if resume_blob and jd_text and jd_text.strip() else None
+    version = scoring_version()
+
+    def insert(session):
+        entry = History(job_title=jd_text[:50] if jd_text else "General Assessment",
+                        score=results['score'], user_id=user_id, report_blob=report_blob,
+                        resume_blob=resume_blob, jd_blob=jd_blob, scored_with=version)
+        session.add(entry)
+        session.flush()
+        if features is not None:
+            # Same transaction: the search and duplicate indexes pick the rows up on their next sync
+            session.add(vector_row(entry.id, features["vector"], features["skills"], features["model_version"]))
+            session.add(signature_row(entry.id, features["signature"], scope))
+        return entry.id
+
+    return history_writer.submit(insert)
+
+def save_analysis(user_id, jd_text, results, features=None, duplicate=None):
+    """Stores a scan and returns its report id once the row is durably committed."""
+    future = queue_analysis(user_id, jd_text, results, features, duplicate)
+    with metrics.timed('db_commit'):
+        return wait_for_write(future)
+
+def wait_for_write(future):
+    """Report id of a queued history write. Raises WriterBusy if it is still queued at the timeout."""
+    try:
+        return future.result(timeout=app.config['HISTORY_WRITE_TIMEOUT'])
+    except FutureTimeout:
+        # Withdraw it, or the row would still appear and a retry would store the scan twice
+        if future.cancel():
+            raise WriterBusy()
+        # The writer already took it: its transaction commits or fails shortly
+        return future.result()
+
+@app.errorhandler(WriterBusy)
+def writer_busy(e):
+    response = jsonify({"error": "Too many scans are being saved right now, please retry shortly."})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
 @app.route('/process_analysis', methods=['POST'])
 @login_required
 def process_analysis():
     file = request.files.get('resume_file')
     jd_text = request.form.get('job_description', '')
     
-    file_path = save_upload(file, app.config['UPLOAD_FOLDER'])
-    if not file_path:
+    with metrics.timed('upload'):
+        pdf_bytes = read_upload(file)
+    if not pdf_bytes:
+        if wants_async():
+            return jsonify({"error": "Upload a valid PDF resume."}), 400
         flash('Upload a valid PDF resume.', 'danger')
         return redirect(url_for('analyze'))
+
+    if wants_async():
+        return enqueue_analysis(pdf_bytes, jd_text)
     
-    resume_text = extract_text_from_pdf(file_path)
-    results = calculate_ats_score(resume_text, jd_text if jd_text.strip() else None)
-    
-    # Store results in session for the Chatbot to access
-    session['last_results'] = results
+    try:
+        resume_text = extract_text_cached(pdf_bytes)
+    except PDFExtractionError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('analyze'))
+    if not resume_text.strip():
+        flash(NO_TEXT_MESSAGE, 'danger')
+        return redirect(url_for('analyze'))
+    # Analysed once: duplicate check, scoring and the stored search vector share the same pass
+    doc = analyze_document(resume_text)
+    signature = minhasher.signature(doc.clean.split())
+    try:
+        with metrics.timed('dedup'):
+            previous, sim = find_near_duplicate(current_user.id, jd_text, signature)
+    except Exception as e:
+        # Only an optimisation: scoring below reports a missing model to the user
+        app.logger.warning(f"Near-duplicate check skipped: {e}")
+        previous, sim = None, 0.0
+    if previous is not None and app.config['DUPLICATE_REUSE'] and not request.form.get('rescore'):
+        # Same resume (give or take a few words) against the same JD: skip the rescore
+        metrics.inc('ats_duplicate_scans_total')
+        results = previous.get_report()
+        remember_report(previous.id, current_user.id, results)
+        flash(f"This resume is {sim:.0%} similar to the one you scanned on {previous.date:%d %b %Y}, "
+              "so that report is shown. Tick 'Run a fresh scan' to analyse it again.", "info")
+        return render_template('report.html', results=results)
+
+    with metrics.timed('scoring'):
+        results = calculate_ats_score(doc, jd_text if jd_text.strip() else None)
+    if 'error' in results:
+        flash(results['error'], 'danger')
+        return redirect(url_for('analyze'))
     
-    new_entry = History(
-        job_title=jd_text[:50] if jd_text else "General Assessment",
-        score=results['score'],
-        full_report_json=json.dumps(results),
-        user_id=current_user.id
-    )
-    db.session.add(new_entry)
-    db.session.commit()
+    try:
+        report_id = save_analysis(current_user.id, jd_text, results, scan_features(doc, signature),
+                                  duplicate=(previous, sim))
+    except WriterBusy:
+        flash("Too many scans are being saved right now. Nothing was stored, please try again shortly.", 'warning')
+        return redirect(url_for('analyze'))
+    # The Chatbot reads the report back from the store by id
+    remember_report(report_id, current_user.id, results)
     
     return render_template('report.html', results=results)
 
+def wants_async():
+    flag = request.values.get('async', '')
+    return app.config['ASYNC_ANALYSIS'] or flag.lower() in ('1', 'true', 'yes')
+
+def enqueue_analysis(pdf_bytes, jd_text):
+    user_id = current_user.id
+
+    def on_done(output):
+        resume_text, results, features = output
+        if 'error' in results:
+            raise RuntimeError(results['error'])
+        if not resume_text.strip():
+            raise RuntimeError(NO_TEXT_MESSAGE)
+        with app.app_context():
+            report_id = save_analysis(user_id, jd_text, results, features)
+            return {"report_id": report_id, "results": results}
+
+    try:
+        job_id = job_queue.submit(analyze_pdf, pdf_bytes, jd_text if jd_text.strip() else None,
+                                  owner=user_id, on_done=on_done)
+    except QueueFull:
+        response = jsonify({"error": "Analysis queue is full, please retry shortly."})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+
+    return jsonify({"job_id": job_id, "status": "queued",
+                    "status_url": url_for('job_status', job_id=job_id)}), 202
+
+@app.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if not job or job['owner'] != current_user.id:
+        return jsonify({"error": "Unknown job."}), 404
+
+    payload = {"job_id": job_id, "status": job['status']}
+    if job['status'] == 'done':
+        payload['report_url'] = url_for('view_report', report_id=job['result']['report_id'])
+        payload['results'] = job['result']['results']
+        remember_report(job['result']['report_id'], current_user.id, job['result']['results'])
+    elif job['status'] == 'failed':
+        payload['error'] = job['error']
+    return jsonify(payload)
+
+@app.route('/api/bulk_analysis', methods=['POST'])
+@login_required
+def bulk_analysis():
+    """Scores every PDF in an uploaded ZIP, streaming one NDJSON line per resume as it finishes."""
+    request.max_content_length = app.config['BULK_MAX_CONTENT_LENGTH']
+    archive = request.files.get('resumes_zip')
+    if not archive or not archive.filename.lower().endswith('.zip') or not zipfile.is_zipfile(archive.stream):
+        return jsonify({"error": "Upload a ZIP archive of PDF resumes as 'resumes_zip'."}), 400
+    jd_text = request.form.get('job_description', '')
+    scored_jd = jd_text if jd_text.strip() else None
+    user_id = current_user.id
+    # Take the spooled upload away from the request: Werkzeug closes request.files when
+    # the view returns, before the streamed body below has read the archive
+    stream, archive.stream = archive.stream, io.BytesIO()
+    members = iter_zip_pdfs(stream, app.config['BULK_MAX_FILES'], app.config['MAX_CONTENT_LENGTH'])
+    window = app.config['BULK_IN_FLIGHT']
+
+    def finish(name, future):
+        """(NDJSON line, pending write or None) for one scored member."""
+        try:
+            resume_text, results, features = future.result()
+        except Exception as e:
+            return {"file": name, "error": str(e) or e.__class__.__name__}, None
+        if 'error' in results:
+            return {"file": name, "error": results['error']}, None
+        if not resume_text.strip():
+            return {"file": name, "error": NO_TEXT_MESSAGE}, None
+        try:
+            write = queue_analysis(user_id, jd_text, results, features)
+        except Exception as e:
+            # e.g. WriterBusy: fail this file, keep streaming the rest
+            return {"file": name, "error": f"Could not save the report: {str(e) or e.__class__.__name__}"}, None
+        return {"file": name, "results": results}, write
+
+    def generate():
+        started = time.perf_counter()
+        in_flight = {}  # future -> member name; at most `window` PDFs are held in memory
+        unsent = []  # (line, write future) in completion order, sent once the write committed
+        counts = {"processed": 0, "failed": 0}
+
+        def send(block):
+            # The background writer batches these inserts; a line goes out with its report id
+            while unsent and (block or unsent[0][1] is None or unsent[0][1].done()):
+                line, write = unsent.pop(0)
+                if write is not None:
+                    try:
+                        report_id = wait_for_write(write)
+                        line = {"file": line["file"], "report_id": report_id, "results": line["results"]}
+                    except Exception as e:
+                        line = {"file": line["file"], "error": f"Could not save the report: {str(e) or e.__class__.__name__}"}
+                counts["failed" if "error" in line else "processed"] += 1
+                yield json.dumps(line) + '\n'
+
+        def drain(block_until):
+            while len(in_flight) > block_until:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    unsent.append(finish(in_flight.pop(future), future))
+                yield from send(block=False)
+
+        try:
+            for name, pdf_bytes, error in members:
+                if error:
+                    unsent.append(({"file": name, "error": error}, None))
+                    yield from send(block=False)
+                    continue
+                # Bulk work counts against the job queue bound; when it is full, wait for our own PDFs
+                while True:
+                    try:
+                        future = job_queue.submit_future(analyze_pdf, pdf_bytes, scored_jd)
+                        break
+                    except QueueFull:
+                        if not in_flight:
+                            future = None
+                            break
+                        yield from drain(len(in_flight) - 1)
+                if future is None:
+                    unsent.append(({"file": name, "error": "Analysis queue is full, please retry this file."}, None))
+                    yield from send(block=False)
+                    continue
+                in_flight[future] = name
+                del pdf_bytes
+                yield from drain(window - 1)
+            yield from drain(0)
+            yield from send(block=True)
+            yield json.dumps({"done": True, **counts,
+                              "seconds": round(time.perf_counter() - started, 3)}) + '\n'
+        finally:
+            # Client went away mid-stream: queued writes still commit, unstarted work is dropped
+            for future in in_flight:
+                future.cancel()
+            stream.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/report/<int:report_id>')
 @login_required
 def view_report(report_id):
@@ -134,10 +531,75 @@ def view_report(report_id):
     if report_entry.user_id != current_user.id:
         return redirect(url_for('dashboard'))
     
-    results = json.loads(report_entry.full_report_json)
-    session['last_results'] = results 
+    results = report_entry.get_report()
+    remember_report(report_id, current_user.id, results)
     return render_template('report.html', results=results)
 
+@app.route('/api/batch_score', methods=['POST'])
+@login_required
+def batch_score():
+    """Scores resume texts against JD texts in one pass: 1 x many, many x 1 or many x many."""
+    data = request.get_json(silent=True) or {}
+    resumes = data.get('resumes') or []
+    jds = data.get('job_descriptions') or []
+    if isinstance(resumes, str): resumes = [resumes]
+    if isinstance(jds, str): jds = [jds]
+
+    if not resumes or not all(isinstance(t, str) for t in resumes + jds):
+        return jsonify({"error": "Send 'resumes' (and optionally 'job_descriptions') as lists of text."}), 400
+    if not all(t.strip() for t in resumes + jds):
+        # Dropping a blank entry would shift every later column / row of the result
+        return jsonify({"error": "Resumes and job descriptions must not be empty."}), 400
+    if len(resumes) * max(len(jds), 1) > app.config['BATCH_MAX_PAIRS']:
+        return jsonify({"error": f"Batch too large (max {app.config['BATCH_MAX_PAIRS']} pairs)."}), 413
+
+    results = calculate_ats_scores_batch(resumes, jds)
+    if isinstance(results, dict):
+        return jsonify(results), 500
+    return jsonify({"results": results})
+
+@app.route('/api/search', methods=['POST'])
+@login_required
+def search_resumes():
+    """Reverse lookup: the k resumes of the current user that best match a job description."""
+    data = request.get_json(silent=True) or {}
+    jd_text = data.get('job_description') or ''
+    skills = data.get('skills') or []
+    if not isinstance(skills, list) or not all(isinstance(s, str) for s in skills):
+        return jsonify({"error": "'skills' must be a list of skill names."}), 400
+    # Aliases and spellings ("ML", "js") resolve to the canonical skills the index stores
+    required, unknown = [], []
+    for name in skills:
+        found = skill_matcher.find(clean_text(name))
+        required.extend(found)
+        if not found: unknown.append(name)
+    if unknown:
+        return jsonify({"error": f"Unknown skills: {', '.join(unknown)}."}), 400
+    try:
+        k = max(1, min(int(data.get('k', 10)), app.config['SEARCH_MAX_K']))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'k' must be an integer."}), 400
+    if not jd_text.strip():
+        return jsonify({"error": "Send a 'job_description' to search with."}), 400
+
+    index, tfidf = get_resume_index()
+    jd = get_jd_features(jd_text, tfidf)
+    # The index holds every user's scans; only the caller's own are searched
+    own_ids = [hid for hid, in db.session.query(History.id).filter_by(user_id=current_user.id)]
+    # Over-fetch a little: rows deleted since the last sync are dropped below
+    hits = index.search(jd.vector, k + 16, required_skills=required, allowed_ids=own_ids)
+    if not hits:
+        return jsonify({"results": []})
+
+    rows = {h.id: h for h in History.query.options(defer(History.full_report_json), defer(History.report_blob))
+            .filter(History.id.in_([hid for hid, _ in hits]), History.user_id == current_user.id).all()}
+    results = [{"history_id": hid,
+                "similarity": round(sim * 100, 1),
+                "job_title": rows[hid].job_title,
+                "date": rows[hid].date.isoformat()}
+               for hid, sim in hits if hid in rows and sim > 0][:k]
+    return jsonify({"results": results, "indexed": len(index)})
+
 # --- 4. RESUME BUILDER ---
 
 @app.route('/builder')
@@ -149,11 +611,11 @@ def builder():
 @login_required
 def generate_resume():
     data = request.form.to_dict()
-    filename = f"builder_{current_user.username}.pdf"
-    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    
-    if generate_resume_pdf(data, file_path):
-        return send_file(file_path, as_attachment=True)
+    # Rendered in memory and streamed back: no shared file on disk to race on
+    pdf_bytes = render_resume_cached(data)
+    if pdf_bytes:
+        return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf', as_attachment=True,
+                         download_name=f"builder_{current_user.username}.pdf")
     
     flash('Error generating PDF.', 'danger')
     return redirect(url_for('builder'))
@@ -165,7 +627,8 @@ def generate_resume():
 def chatbot_response():
     data = request.get_json()
     user_msg = data.get("message", "").lower()
-    results = session.get('last_results', {})
+    report_id = session.get('last_report_id')
+    results = load_report(report_id, current_user.id) if report_id else None
     
     if not results:
         return jsonify({"response": "Analysis data missing. Please scan your resume again."})
@@ -208,7 +671,113 @@ def chatbot_response():
 
     return jsonify({"response": "I'm ready! Select a topic above."})
 
+# --- 6. MAINTENANCE COMMANDS ---
+
+@app.cli.command('compress-reports')
+@click.option('--chunk-size', default=500, show_default=True, help='Rows converted per transaction.')
+def compress_reports(chunk_size):
+    """Converts legacy full_report_json rows to the compressed report_blob format."""
+    converted, saved, last_id = 0, 0, 0
+    while True:
+        rows = db.session.execute(
+            select(History.id, History.full_report_json)
+            .where(History.id > last_id, History.full_report_json.is_not(None), History.report_blob.is_(None))
+            .order_by(History.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        updates = []
+        for row_id, raw in rows:
+            blob = encode_report(json.loads(raw))
+            updates.append({"id": row_id, "report_blob": blob, "full_report_json": None})
+            saved += len(raw.encode('utf-8')) - len(blob)
+        db.session.execute(update(History), updates)
+        db.session.commit()
+        converted += len(rows)
+        last_id = rows[-1][0]
+        click.echo(f"Converted {converted} reports (last id {last_id})")
+    click.echo(f"Done: {converted} reports converted, {saved / 1024:.1f} KiB saved.")
+
+def _replace_rows(model, rows):
+    ids = [r['history_id'] for r in rows]
+    db.session.execute(delete(model).where(model.history_id.in_(ids)))
+    db.session.execute(insert(model), rows)
+
+@app.cli.command('rescore')
+@click.option('--chunk-size', default=200, show_default=True, help='Scans per worker task and per transaction.')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Scoring processes.')
+@click.option('--all', 'rescore_all', is_flag=True, help='Also re-score scans already tagged with the current version.')
+@click.option('--rebuild-index', is_flag=True, help='Rewrite the search vectors and duplicate signatures too.')
+def rescore(chunk_size, workers, rescore_all, rebuild_index):
+    """Re-scores stored scans with the current model, taxonomy and rules.
+
+    Every committed chunk is tagged with the scoring version, so an interrupted
+    run picks up where it stopped when started again.
+    """
+    version = scoring_version()
+    stale = History.resume_blob.is_not(None)
+    if not rescore_all:
+        stale = and_(stale, or_(History.scored_with.is_(None), History.scored_with != version))
+    total = db.session.scalar(select(func.count(History.id)).where(stale))
+    missing = db.session.scalar(select(func.count(History.id)).where(History.resume_blob.is_(None)))
+    if missing:
+        click.echo(f"{missing} older scans have no stored resume text and keep their score.")
+    if not total:
+        click.echo(f"Nothing to re-score (version {version}).")
+        return
+    click.echo(f"Re-scoring {total} scans with version {version} on {workers} workers...")
+
+    done, started = 0, time.perf_counter()
+
+    def apply(future):
+        nonlocal done
+        updates, vectors, signatures = future.result()
+        with metrics.timed('db_commit'):
+            db.session.execute(update(History), updates)
+            if vectors:
+                _replace_rows(ResumeVector, vectors)
+                _replace_rows(ResumeSignature, signatures)
+            db.session.commit()
+        done += len(updates)
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        click.echo(f"Re-scored {done}/{total} scans ({rate:.0f} scans/s, ETA {eta:.0f}s)")
+
+    # Rows are streamed in chunks from a separate connection (a WAL read snapshot), so the
+    # bulk updates committed meanwhile neither block nor reshuffle the cursor
+    ctx = multiprocessing.get_context('spawn')
+    with db.engine.connect() as reader, \
+            ProcessPoolExecutor(workers, mp_context=ctx, initializer=warm_up) as pool:
+        rows = reader.execution_options(yield_per=chunk_size).execute(
+            select(History.id, History.user_id, History.resume_blob, History.jd_blob)
+            .where(stale).order_by(History.id))
+        in_flight = set()
+        try:
+            for chunk in rows.partitions():
+                in_flight.add(pool.submit(rescore_rows, [tuple(r) for r in chunk], version, rebuild_index))
+                while len(in_flight) >= 2 * workers:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        apply(future)
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    apply(future)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            click.echo(f"Interrupted after {done} scans; run the command again to continue.")
+            return
+        finally:
+            rows.close()
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Done: {done} scans re-scored in {elapsed:.1f}s ({done / elapsed:.0f} scans/s).")
+    # Running workers keep serving the old reports from report_cache (and, with
+    # --rebuild-index, the old search and duplicate indexes) until they restart
+    if rebuild_index:
+        click.echo("Restart the web workers so their report caches and search and duplicate indexes reload.")
+    else:
+        click.echo("Restart the web workers so their report caches serve the new scores.")
+
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""Compares two benchmarks/run.py JSON reports and flags regressions.
+
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+
+Exits with status 1 when any metric got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when bigger is better
+METRICS = {"best_ms": False, "p50_ms": False, "p95_ms": False, "req_per_s": True}
+
+
+def flatten(report):
+    for section in ('micro', 'endpoint'):
+        for name, values in report.get(section, {}).items():
+            for metric, higher_is_better in METRICS.items():
+                if metric in values:
+                    yield f"{section}.{name}.{metric}", values[metric], higher_is_better
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        old = {k: (v, hib) for k, v, hib in flatten(json.load(f))}
+    with open(args.candidate) as f:
+        new = {k: (v, hib) for k, v, hib in flatten(json.load(f))}
+
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        (before, higher_is_better), (after, _) = old[key], new[key]
+        if not before:
+            continue
+        change = (after - before) / before
+        slower = -change if higher_is_better else change
+        flag = 'REGRESSION' if slower > args.threshold else ''
+        regressions += bool(flag)
+        print(f"{key:60s} {before:>12.3f} -> {after:>12.3f}  {change:+7.1%} {flag}")
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
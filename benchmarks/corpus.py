@@ -0,0 +1,72 @@
+"""Deterministic synthetic resumes and job descriptions for the benchmarks (fully offline)."""
+import random
+
+from fpdf import FPDF
+
+SKILLS = ['python', 'java', 'javascript', 'sql', 'flask', 'html', 'css', 'machine learning',
+          'random forest', 'xgboost', 'data preprocessing', 'cybersecurity', 'networking',
+          'git', 'github', 'mysql', 'nlp', 'docker', 'kubernetes', 'aws', 'react', 'spark']
+VERBS = ['led', 'managed', 'developed', 'optimized', 'created', 'increased', 'reduced', 'built', 'designed']
+NOUNS = ['pipeline', 'service', 'dashboard', 'platform', 'api', 'model', 'team', 'migration', 'report',
+         'feature', 'workflow', 'database', 'integration', 'test suite', 'deployment']
+HEADINGS = ['Experience', 'Education', 'Skills', 'Projects', 'Certifications', 'Achievements']
+
+
+def _bullet(rng):
+    metric = rng.choice([f'by {rng.randint(5, 80)}%', f'saving ${rng.randint(1, 900)}k', 'for 3 clients', ''])
+    return (f"- {rng.choice(VERBS).capitalize()} a {rng.choice(NOUNS)} using {rng.choice(SKILLS)} "
+            f"and {rng.choice(SKILLS)} {metric}").strip()
+
+
+def make_resume(words, seed=0):
+    """Plain-text resume of roughly `words` words with the usual section headings."""
+    rng = random.Random(seed)
+    lines = [f"Candidate {seed}", f"candidate{seed}@example.com | +1 555 {seed:04d} | Remote", ""]
+    count = 0
+    while count < words:
+        heading = rng.choice(HEADINGS)
+        lines.append(heading.upper())
+        for _ in range(rng.randint(3, 8)):
+            line = _bullet(rng)
+            lines.append(line)
+            count += len(line.split())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def make_jd(words, seed=0):
+    rng = random.Random(10_000 + seed)
+    wanted = rng.sample(SKILLS, 6)
+    parts = [f"We are hiring an engineer with {', '.join(wanted)}."]
+    count = len(parts[0].split())
+    while count < words:
+        line = (f"You will {rng.choice(VERBS)} the {rng.choice(NOUNS)} and work with "
+                f"{rng.choice(wanted)} on a daily basis.")
+        parts.append(line)
+        count += len(line.split())
+    return " ".join(parts)
+
+
+def make_pdf(text, pages=1):
+    """Renders text into a PDF of at least `pages` pages and returns the bytes."""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", '', 10)
+    for page in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 5, text.encode('latin-1', 'ignore').decode('latin-1'))
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def builder_form(seed=0):
+    rng = random.Random(20_000 + seed)
+    return {
+        'full_name': f'Candidate {seed}', 'email': f'candidate{seed}@example.com',
+        'phone': f'+1 555 {seed:04d}', 'location': 'Remote',
+        'summary': make_jd(40, seed),
+        'experience': "\n".join(_bullet(rng) for _ in range(8)),
+        'projects': "\n".join(_bullet(rng) for _ in range(4)),
+        'education': 'University | B.Tech | 2024',
+        'skills': ', '.join(rng.sample(SKILLS, 8)),
+        'certifications': 'AWS Certified', 'achievements': 'Hackathon winner',
+    }
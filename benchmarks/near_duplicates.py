@@ -0,0 +1,73 @@
+"""Lookup latency of the near-duplicate (MinHash/LSH) index at scale.
+
+    python benchmarks/near_duplicates.py [--docs 1000000] [--queries 1000]
+
+Fills a NearDuplicateIndex with random signatures spread over many scopes
+(user x JD), then times candidate lookups for unseen signatures and for
+lightly perturbed copies of stored ones, and prints JSON latency percentiles
+plus the recall of the perturbed copies. Target: sub-millisecond p95 for
+a million documents.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from near_duplicates import NUM_PERM, NearDuplicateIndex, scope_key  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--scopes', type=int, default=20000, help='distinct (user, JD) pairs')
+    parser.add_argument('--batch', type=int, default=20000, help='rows per incremental append')
+    parser.add_argument('--changed', type=float, default=0.05, help='share of MinHash values perturbed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scopes = [scope_key(i, 'jd', 'model') for i in range(args.scopes)]
+    sigs = rng.integers(0, 2 ** 32, size=(args.docs, NUM_PERM), dtype=np.uint32)
+    doc_scopes = rng.integers(0, args.scopes, size=args.docs)
+
+    index = NearDuplicateIndex()
+    t = time.perf_counter()
+    for start in range(0, args.docs, args.batch):
+        stop = min(start + args.batch, args.docs)
+        index.add(np.arange(start + 1, stop + 1), sigs[start:stop], [scopes[s] for s in doc_scopes[start:stop]])
+    build = time.perf_counter() - t
+
+    timings = {"unseen": [], "near_duplicate": []}
+    found = 0
+    for q in range(args.queries):
+        fresh = rng.integers(0, 2 ** 32, size=NUM_PERM, dtype=np.uint32)
+        t = time.perf_counter()
+        index.candidates(fresh, scopes[q % args.scopes])
+        timings["unseen"].append((time.perf_counter() - t) * 1000)
+
+        doc = int(rng.integers(args.docs))
+        copy = sigs[doc].copy()
+        changed = rng.random(NUM_PERM) < args.changed
+        copy[changed] = rng.integers(0, 2 ** 32, size=int(changed.sum()), dtype=np.uint32)
+        t = time.perf_counter()
+        hits = index.candidates(copy, scopes[doc_scopes[doc]])
+        timings["near_duplicate"].append((time.perf_counter() - t) * 1000)
+        found += (doc + 1) in hits
+
+    nbytes = sum(k.nbytes + i.nbytes for k, i in index._blocks)
+    result = {"docs": len(index), "blocks": len(index._blocks), "build_seconds": round(build, 3),
+              "index_mb": round(nbytes / 2 ** 20, 1), "recall": round(found / args.queries, 4)}
+    for name, ms in timings.items():
+        result[name] = {"p50_ms": round(float(np.percentile(ms, 50)), 4),
+                        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+                        "max_ms": round(max(ms), 3)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
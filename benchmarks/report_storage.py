@@ -0,0 +1,79 @@
+"""Size and decode-time comparison of History report encodings.
+
+    python benchmarks/report_storage.py [--db resume_data.db] [--reports 2000]
+
+Uses the reports stored in the database when there are any, otherwise
+synthetic reports produced by calculate_ats_score. Prints JSON.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from report_codec import FORMAT_ZLIB_JSON, FORMAT_ZLIB_MSGPACK, decode_report, encode_report, msgpack  # noqa: E402
+
+
+def load_reports(db_path):
+    if not db_path or not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT full_report_json FROM history WHERE full_report_json IS NOT NULL").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    conn.close()
+    return [json.loads(r[0]) for r in rows]
+
+
+def synthetic_reports(n, seed=0):
+    from ml_logic import TECHNICAL_SKILLS_DB, calculate_ats_score
+    rng = random.Random(seed)
+    words = TECHNICAL_SKILLS_DB + ['experience', 'education', 'projects', 'led', 'team', 'built', '20%', 'api']
+    reports = []
+    for i in range(n):
+        resume = ' '.join(rng.choice(words) for _ in range(rng.randint(100, 900)))
+        jd = ' '.join(rng.choice(words) for _ in range(rng.randint(20, 200))) if i % 2 else None
+        reports.append(calculate_ats_score(resume, jd))
+    return reports
+
+
+def bench(reports, encode, decode, repeat=5):
+    blobs = [encode(r) for r in reports]
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for b in blobs:
+            decode(b)
+        best = min(best, time.perf_counter() - t)
+    total = sum(len(b) for b in blobs)
+    return {"total_bytes": total, "avg_bytes": round(total / len(blobs), 1),
+            "decode_us_per_report": round(best / len(blobs) * 1e6, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=os.path.join(os.path.dirname(__file__), '..', 'resume_data.db'))
+    parser.add_argument('--reports', type=int, default=2000, help='synthetic reports when the DB is empty')
+    args = parser.parse_args()
+
+    reports = load_reports(args.db)
+    source = 'database'
+    if not reports:
+        reports, source = synthetic_reports(args.reports), 'synthetic'
+
+    results = {"source": source, "reports": len(reports), "formats": {
+        "json_text": bench(reports, lambda r: json.dumps(r).encode('utf-8'), json.loads),
+        "zlib_json": bench(reports, lambda r: encode_report(r, FORMAT_ZLIB_JSON), decode_report),
+    }}
+    if msgpack is not None:
+        results["formats"]["zlib_msgpack"] = bench(reports, lambda r: encode_report(r, FORMAT_ZLIB_MSGPACK), decode_report)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Benchmark suite for the extraction -> scoring -> reporting pipeline.
+
+    python benchmarks/run.py [--quick] [--output results.json]
+    python benchmarks/compare.py old.json new.json
+
+Everything runs offline against a synthetic corpus (benchmarks/corpus.py).
+The endpoint benchmark drives /process_analysis through the Flask test
+client against a throwaway SQLite database, so the real resume_data.db and
+cache.db are never touched.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+WORKDIR = tempfile.mkdtemp(prefix='ats-bench-')
+# Must be set before any project module reads Config
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+os.environ['CACHE_DB_PATH'] = os.path.join(WORKDIR, 'cache.db')
+sys.path.insert(0, ROOT)
+warnings.filterwarnings('ignore')
+
+import corpus  # noqa: E402
+from ml_logic import analyze_document, calculate_ats_score, clean_text, detect_sections  # noqa: E402
+from utils import extract_text_from_pdf, generate_resume_pdf, render_resume_cached  # noqa: E402
+
+
+def timeit(fn, repeat, min_time=0.05):
+    """Calls fn until min_time has passed, `repeat` times; returns per-call stats in ms."""
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        calls, start = 0, time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        samples.append(elapsed / calls * 1000)
+    return {"best_ms": round(min(samples), 4), "median_ms": round(statistics.median(samples), 4)}
+
+
+def micro_benchmarks(sizes, pages, repeat):
+    results = {}
+    jd = corpus.make_jd(250, seed=1)
+    for words in sizes:
+        resume = corpus.make_resume(words, seed=words)
+        clean = clean_text(resume)
+        results[f"clean_text[{words}w]"] = timeit(lambda: clean_text(resume), repeat)
+        results[f"detect_sections[{words}w]"] = timeit(lambda: detect_sections(resume), repeat)
+        results[f"analyze_document[{words}w]"] = timeit(lambda: analyze_document(resume), repeat)
+        results[f"calculate_ats_score.jd[{words}w]"] = timeit(lambda: calculate_ats_score(resume, jd), repeat)
+        results[f"calculate_ats_score.audit[{words}w]"] = timeit(lambda: calculate_ats_score(resume), repeat)
+        assert clean
+
+    for n in pages:
+        data = corpus.make_pdf(corpus.make_resume(600, seed=n), pages=n)
+        results[f"extract_text_from_pdf[{n}p]"] = timeit(lambda: extract_text_from_pdf(data), repeat)
+
+    form = corpus.builder_form(seed=1)
+    results["generate_resume_pdf"] = timeit(lambda: generate_resume_pdf(form), repeat)
+    results["render_resume_cached.hit"] = timeit(lambda: render_resume_cached(form), repeat)
+    return results
+
+
+def endpoint_benchmark(requests, pages):
+    from app import app, db  # imported late: builds the app against the throwaway DB
+
+    app.config['TESTING'] = True
+    client = app.test_client()
+    client.post('/register', data={'username': 'bench', 'email': 'bench@example.com', 'password': 'bench'})
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+
+    jd = corpus.make_jd(250, seed=2)
+    unique = [corpus.make_pdf(corpus.make_resume(600, seed=100 + i), pages=pages) for i in range(requests)]
+
+    def run(payloads, with_jd):
+        latencies = []
+        start = time.perf_counter()
+        for data in payloads:
+            t = time.perf_counter()
+            # rescore=1: re-uploads must be scored again, not answered by the near-duplicate check
+            r = client.post('/process_analysis', content_type='multipart/form-data',
+                            data={'resume_file': (io.BytesIO(data), 'resume.pdf'),
+                                  'job_description': jd if with_jd else '', 'rescore': '1'})
+            latencies.append((time.perf_counter() - t) * 1000)
+            assert r.status_code == 200, r.status_code
+        total = time.perf_counter() - start
+        latencies.sort()
+        return {"requests": len(payloads), "req_per_s": round(len(payloads) / total, 2),
+                "p50_ms": round(latencies[len(latencies) // 2], 3),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)}
+
+    def run_builder(forms):
+        start = time.perf_counter()
+        latencies = []
+        for form in forms:
+            t = time.perf_counter()
+            r = client.post('/generate_resume', data=form)
+            latencies.append((time.perf_counter() - t) * 1000)
+            assert r.status_code == 200 and r.data.startswith(b'%PDF'), r.status_code
+        total = time.perf_counter() - start
+        latencies.sort()
+        return {"requests": len(forms), "req_per_s": round(len(forms) / total, 2),
+                "p50_ms": round(latencies[len(latencies) // 2], 3),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)}
+
+    results = {
+        # renders per second: every form distinct, then the same form repeatedly
+        "generate_resume.unique": run_builder([corpus.builder_form(seed=500 + i) for i in range(requests)]),
+        "generate_resume.repeat": run_builder([corpus.builder_form(seed=1)] * requests),
+        "process_analysis.jd.cold": run(unique, True),
+        # same bytes again: the extracted-text cache is warm now
+        "process_analysis.jd.warm": run(unique, True),
+        "process_analysis.audit.warm": run(unique, False),
+    }
+    with app.app_context():
+        db.session.remove()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='smaller corpus, fewer repeats')
+    parser.add_argument('--output', help='write JSON here as well as to stdout')
+    parser.add_argument('--skip-endpoint', action='store_true')
+    args = parser.parse_args()
+
+    sizes, pages, repeat, requests = ([200, 600, 2000], [1, 5, 30], 5, 40) if not args.quick \
+        else ([200, 1000], [1, 10], 3, 10)
+
+    report = {
+        "meta": {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "timestamp": datetime.now(timezone.utc).isoformat(),
+                 "quick": args.quick},
+        "micro": micro_benchmarks(sizes, pages, repeat),
+    }
+    if not args.skip_endpoint:
+        report["endpoint"] = endpoint_benchmark(requests, pages=2)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,86 @@
 import os
 
+def _in_memory_sqlite(uri):
+    # Parsed by hand: config is imported by pool workers, which should not pay for sqlalchemy
+    scheme, _, rest = uri.partition('://')
+    return scheme.split('+')[0] == 'sqlite' and (rest.split('?')[0] in ('', '/', '/:memory:') or 'mode=memory' in rest)
+
 class Config:
     # Basic Flask Settings
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'ats-scanner-secret-key-9988'
     
     # Database Configuration
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'resume_data.db')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(BASE_DIR, 'resume_data.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    HISTORY_PAGE_SIZE = 25
+    # Connection pool per worker process (the pool is emptied after a fork); an in-memory
+    # SQLite database gets a single shared connection that takes no pool options
+    SQLALCHEMY_ENGINE_OPTIONS = ({} if _in_memory_sqlite(SQLALCHEMY_DATABASE_URI)
+                                 else {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30})
+    # SQLite pragmas applied to every connection (WAL is always on); FULL survives power loss
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'FULL')
+    SQLITE_BUSY_TIMEOUT_MS = 5000
+    # Background History writer: rows per transaction, seconds to wait to fill one, queue bound
+    HISTORY_WRITE_BATCH = 64
+    HISTORY_FLUSH_INTERVAL = 0.005
+    HISTORY_WRITE_QUEUE = 1024
+    HISTORY_WRITE_TIMEOUT = float(os.environ.get('HISTORY_WRITE_TIMEOUT', 30))  # seconds a request waits for its commit
     
     # Upload Configuration
-    UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB Upload Limit
     
+    # PDF extraction limits; documents with PDF_PARALLEL_PAGES+ pages are split across a process pool
+    PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 100))
+    PDF_MAX_CHARS = int(os.environ.get('PDF_MAX_CHARS', 500000))
+    PDF_PARALLEL_PAGES = 24
+    PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+
+    # Extracted-text cache (SQLite file shared by all workers)
+    CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH') or os.path.join(BASE_DIR, 'cache.db')
+    PDF_CACHE_ENTRIES = 512
+    PDF_CACHE_BYTES = 64 * 1024 * 1024
+    PDF_CACHE_ROWS = 50000
+
+    # Asynchronous analysis jobs (/process_analysis?async=1, polled via /jobs/<id>)
+    ASYNC_ANALYSIS = os.environ.get('ASYNC_ANALYSIS', '0') == '1'
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 32))  # beyond this requests get 429
+    JOB_RESULT_TTL = 600  # seconds a finished job stays pollable
+    JOB_STORE_ROWS = 10000  # job records kept in cache.db so every worker process can answer a poll
+
+    # Bulk ZIP uploads (/api/bulk_analysis): size limits and resumes in flight on the job pool
+    BULK_MAX_CONTENT_LENGTH = int(os.environ.get('BULK_MAX_CONTENT_LENGTH', 256 * 1024 * 1024))
+    BULK_MAX_FILES = int(os.environ.get('BULK_MAX_FILES', 1000))
+    BULK_IN_FLIGHT = int(os.environ.get('BULK_IN_FLIGHT', 8))
+
+    # Resume builder render cache (identical form submissions are served from memory)
+    RENDER_CACHE_ENTRIES = 256
+    RENDER_CACHE_BYTES = 32 * 1024 * 1024
+
+    # Decoded reports by id, read by /get_chat_response (the session stores only the id)
+    REPORT_CACHE_ENTRIES = 2048
+    REPORT_CACHE_BYTES = 32 * 1024 * 1024
+
+    # Maximum resume x JD pairs scored by a single /api/batch_score call
+    BATCH_MAX_PAIRS = 25000
+
+    # Near-duplicate uploads: estimated Jaccard similarity (word 3-gram MinHash) against an
+    # earlier scan by the same user for the same JD; at or above it the earlier report is reused
+    DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.9))
+    DUPLICATE_REUSE = os.environ.get('DUPLICATE_REUSE', '1') == '1'
+
+    # Largest k accepted by /api/search
+    SEARCH_MAX_K = 200
+
+    # Server-Timing headers and the Prometheus /metrics endpoint
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
     # Model Paths
     MODEL_PATH = os.path.join(BASE_DIR, 'models/ats_model.pkl')
-    VECTORIZER_PATH = os.path.join(BASE_DIR, 'models/vectorizer.pkl')
\ No newline at end of file
+    VECTORIZER_PATH = os.path.join(BASE_DIR, 'models/vectorizer.pkl')
+    # Memory-mappable export (train_model.py --export); 'auto' uses it when present
+    MODEL_ARTIFACT_DIR = os.path.join(BASE_DIR, 'models/ats_artifacts')
+    MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'auto')  # auto | mmap | pickle
+    # Seconds between checks for changed model files (hot reload)
+    MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 5))
\ No newline at end of file
@@ -1,7 +1,16 @@
 import json # Add this at the top
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import deferred
+from report_codec import decode_report
 
 db = SQLAlchemy()
 
@@ -18,10 +27,179 @@ class History(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     job_title = db.Column(db.String(100))
     score = db.Column(db.Float)
-    # NEW: Store the full ML result dictionary as a JSON string
+    # Legacy: full ML result dictionary as a JSON string (see compress-reports)
     full_report_json = db.Column(db.Text) 
+    # Current: versioned, compressed report blob (report_codec)
+    report_blob = db.Column(db.LargeBinary)
+    # Inputs kept for re-scoring (`flask rescore`): compressed resume and JD text, loaded on access
+    resume_blob = deferred(db.Column(db.LargeBinary))
+    jd_blob = deferred(db.Column(db.LargeBinary))
+    scored_with = db.Column(db.String(16))  # ml_logic.scoring_version() of the stored score
     date = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Dashboard / history listings always filter by user and sort by date
+    __table_args__ = (db.Index('ix_history_user_date', 'user_id', 'date'),)
+
     def get_report(self):
-        return json.loads(self.full_report_json) if self.full_report_json else {}
\ No newline at end of file
+        if self.report_blob:
+            return decode_report(self.report_blob)
+        return json.loads(self.full_report_json) if self.full_report_json else {}
+
+class ResumeVector(db.Model):
+    """TF-IDF vector + matched skills of an analysed resume, used by the search index."""
+    __tablename__ = 'resume_vector'
+    history_id = db.Column(db.Integer, db.ForeignKey('history.id'), primary_key=True)
+    model_version = db.Column(db.String(16), nullable=False)  # vectorizer digest prefix
+    term_ids = db.Column(db.LargeBinary, nullable=False)  # int32 column indices
+    weights = db.Column(db.LargeBinary, nullable=False)  # float32 tf-idf weights
+    skills = db.Column(db.Text)  # comma separated canonical skills
+    history = db.relationship('History', backref=db.backref('vector', uselist=False, cascade="all, delete-orphan"))
+
+class ResumeSignature(db.Model):
+    """MinHash signature of an analysed resume, used for near-duplicate detection."""
+    __tablename__ = 'resume_signature'
+    history_id = db.Column(db.Integer, db.ForeignKey('history.id'), primary_key=True)
+    scope = db.Column(db.String(16), nullable=False)  # hash of (user, JD, model): only equal scopes match
+    signature = db.Column(db.LargeBinary, nullable=False)  # uint32 MinHash values
+    history = db.relationship('History', backref=db.backref('signature', uselist=False, cascade="all, delete-orphan"))
+
+def ensure_schema():
+    """create_all() plus the pieces it skips on existing tables (new columns and indexes)."""
+    db.create_all()
+    inspector = inspect(db.engine)
+    for table in (User.__table__, History.__table__, ResumeVector.__table__, ResumeSignature.__table__):
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                col_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def configure_sqlite(engine, synchronous='FULL', busy_timeout_ms=5000):
+    """Sets WAL mode and connection pragmas on every new SQLite connection of `engine`.
+
+    WAL lets readers run alongside the single writer instead of failing with
+    "database is locked"; busy_timeout makes a second writer wait its turn.
+    synchronous=FULL keeps every committed scan across a power loss.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA cache_size=-16000')  # ~16 MB page cache per connection
+        cursor.close()
+
+    # Pooled connections must not cross a fork (gunicorn --preload): children start empty
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
+class WriterBusy(Exception):
+    pass
+
+class BatchWriter:
+    """Background thread that applies writes in batched transactions (group commit).
+
+    `submit(fn)` queues fn(session) and returns a Future resolved once the
+    transaction containing it has committed, so a caller that waits on it only
+    acknowledges durable rows. Cancelling the Future while it is still queued
+    withdraws the write. The thread takes whatever is queued (up to
+    `batch_size`, waiting at most `flush_interval` seconds to fill a batch) and
+    commits it at once: concurrent requests share one transaction instead of
+    contending for the SQLite write lock. If a batch fails it is replayed one
+    write per transaction so only the faulty write reports an error.
+    """
+
+    def __init__(self, app, batch_size=64, flush_interval=0.01, max_pending=1024):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(max_pending)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+
+    def _ensure_thread(self):
+        # Started lazily and per process: a thread does not survive gunicorn's fork
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    if self._pid != os.getpid():
+                        self._queue = queue.Queue(self._queue.maxsize)
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                    self._thread.start()
+
+    def submit(self, fn, timeout=10):
+        self._ensure_thread()
+        future = Future()
+        try:
+            self._queue.put((fn, future), timeout=timeout)
+        except queue.Full:
+            raise WriterBusy()
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Writes cancelled while queued are dropped; the rest can no longer be cancelled
+            batch = [(fn, future) for fn, future in self._next_batch() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            error = None
+            try:
+                with self.app.app_context():
+                    self._apply(batch)
+            except Exception as e:
+                # rollback() or the app context itself failed: keep the thread alive
+                error = e
+            finally:
+                # No caller may be left waiting on a write this batch never resolved
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error or RuntimeError("History write was not applied."))
+            self.batches += 1
+            self.writes += len(batch)
+
+    def _apply(self, batch):
+        try:
+            results = [fn(db.session) for fn, _ in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for fn, future in batch:
+                try:
+                    result = fn(db.session)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
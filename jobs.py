@@ -0,0 +1,217 @@
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ml_logic import analyze_document, calculate_ats_score, registry, resume_features, warm_up
+from near_duplicates import MinHasher, resume_scope, signature_fields
+from report_codec import decode_text, encode_report, encode_text
+from search_index import vector_fields
+from utils import extract_text_cached
+
+_minhasher = MinHasher()
+
+
+class QueueFull(Exception):
+    pass
+
+
+def scan_features(doc, signature=None):
+    """Everything stored next to a scan's report, computed from one AnalyzedDocument.
+
+    The compressed resume text (for `flask rescore`), the search vector and
+    skills, the MinHash signature and the model version the vector belongs to.
+    """
+    vector, skills = resume_features(doc)
+    if signature is None:
+        signature = _minhasher.signature(doc.clean.split())
+    return {"resume_blob": encode_text(doc.text), "vector": vector, "skills": skills,
+            "signature": signature, "model_version": registry.fingerprint[:16]}
+
+
+def analyze_pdf(pdf_bytes, jd_text=None):
+    """Full analysis of one uploaded PDF. Runs inside a pool worker process.
+
+    Returns (resume_text, results, features): the scan_features are computed here
+    too, so the web process only has to insert the rows.
+    """
+    resume_text = extract_text_cached(pdf_bytes)
+    doc = analyze_document(resume_text)
+    results = calculate_ats_score(doc, jd_text)
+    features = scan_features(doc) if 'error' not in results and doc.text.strip() else None
+    return resume_text, results, features
+
+
+def rescore_rows(rows, version, rebuild_index=False):
+    """Re-scores stored scans inside a pool worker (`flask rescore`).
+
+    rows are (history_id, user_id, resume_blob, jd_blob) tuples. Returns History
+    updates plus, with rebuild_index, fresh ResumeVector and ResumeSignature
+    rows, all as dicts ready for bulk statements.
+    """
+    updates, vectors, signatures = [], [], []
+    for history_id, user_id, resume_blob, jd_blob in rows:
+        doc = analyze_document(decode_text(resume_blob))
+        jd_text = decode_text(jd_blob) if jd_blob else None
+        results = calculate_ats_score(doc, jd_text)
+        if 'error' in results:
+            raise RuntimeError(results['error'])
+        updates.append({"id": history_id, "score": results['score'], "report_blob": encode_report(results),
+                        "full_report_json": None, "scored_with": version})
+        if rebuild_index:
+            f = scan_features(doc)
+            vectors.append({"history_id": history_id, **vector_fields(f["vector"], f["skills"], f["model_version"])})
+            scope = resume_scope(user_id, jd_text, f["model_version"])
+            signatures.append({"history_id": history_id, **signature_fields(f["signature"], scope)})
+    return updates, vectors, signatures
+
+
+class JobQueue:
+    """Bounded job queue on top of a local process pool.
+
+    `submit` rejects work with QueueFull once `max_pending` jobs are queued or
+    running. Finished jobs are kept for `result_ttl` seconds so clients can poll them.
+    on_done callbacks run on a small thread pool of their own: the process pool
+    delivers every result from one manager thread, which must never block on them.
+
+    With a `store` (a cache.SQLiteStore), job records are also written there as
+    JSON, so a poll answered by another worker process still finds the job.
+    """
+
+    def __init__(self, workers=2, max_pending=32, result_ttl=600, start_method='spawn', store=None):
+        self.workers = workers
+        self.store = store
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.start_method = start_method
+        self._executor = None
+        self._finisher = ThreadPoolExecutor(workers, thread_name_prefix='job-finish')
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Created lazily so a --preload master never forks/spawns workers itself
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    ctx = multiprocessing.get_context(self.start_method)
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=warm_up)
+        return self._executor
+
+    def _pool_submit(self, fn, *args):
+        executor = self.executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault): the pool refuses all further work, so replace it
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return self.executor.submit(fn, *args)
+
+    def submit(self, fn, *args, owner=None, on_done=None):
+        """Queues fn(*args); on_done(result) runs in this process and its return value becomes the job result."""
+        with self._lock:
+            self._reserve()
+            job_id = uuid.uuid4().hex
+            job = {"id": job_id, "owner": owner, "status": "queued", "result": None,
+                   "error": None, "created": time.time(), "finished": None}
+            self._jobs[job_id] = job
+        self._publish(job)
+
+        try:
+            future = self._pool_submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                del self._jobs[job_id]
+            if self.store is not None:
+                self.store.delete(job_id)
+            raise
+        job["future"] = future
+        future.add_done_callback(lambda f: self._finisher.submit(self._finish, job, f, on_done))
+        return job_id
+
+    def submit_future(self, fn, *args):
+        """Queues fn(*args) under the same `max_pending` bound and returns its Future (no job record)."""
+        with self._lock:
+            self._reserve()
+        try:
+            future = self._pool_submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda f: self._release())
+        return future
+
+    def _reserve(self):
+        # caller holds self._lock
+        self._prune()
+        if self._pending >= self.max_pending:
+            raise QueueFull()
+        self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _finish(self, job, future, on_done):
+        try:
+            result = future.result()
+            job["result"] = on_done(result) if on_done else result
+            job["status"] = "done"
+        except Exception as e:
+            job["error"] = str(e) or e.__class__.__name__
+            job["status"] = "failed"
+        finally:
+            job["finished"] = time.time()
+            job.pop("future", None)
+            with self._lock:
+                self._pending -= 1
+            self._publish(job)
+
+    def _publish(self, job):
+        if self.store is not None:
+            self.store.put(job["id"], json.dumps({k: v for k, v in job.items() if k != "future"}))
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [k for k, j in self._jobs.items() if j["finished"] and j["finished"] < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return self._load(job_id)
+        future = job.get("future")
+        if future is not None and job["status"] == "queued" and (future.running() or future.done()):
+            # done() but no job status yet: on_done is still saving the result
+            job["status"] = "running"
+            self._publish(job)
+        return job
+
+    def _load(self, job_id):
+        """A job submitted by another process, from the shared store."""
+        raw = self.store.get(job_id) if self.store is not None else None
+        if raw is None:
+            return None
+        job = json.loads(raw)
+        if job["finished"] and job["finished"] < time.time() - self.result_ttl:
+            return None
+        return job
+
+    def stats(self):
+        return {"pending": self._pending, "max_pending": self.max_pending, "workers": self.workers}
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._finisher.shutdown(wait=wait)
+        self._finisher = ThreadPoolExecutor(self.workers, thread_name_prefix='job-finish')
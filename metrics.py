@@ -0,0 +1,147 @@
+"""Lightweight in-process metrics: stage timers, counters and histograms.
+
+Stage timings recorded during a request are also collected on `flask.g` so
+app.py can emit them as a Server-Timing header. `render()` produces the
+Prometheus text exposition format served by /metrics. Values are per process
+(each gunicorn worker reports its own).
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAGE_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+enabled = True
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_bucket_defs = {}  # name -> buckets
+_help = {}
+_collectors = []  # (callable returning [(name, labels, value)], prometheus type)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def describe(name, text):
+    _help[name] = text
+
+
+def inc(name, value=1, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _bucket_defs.setdefault(name, buckets)
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                h[i] += 1
+                break
+        h[-2] += value
+        h[-1] += 1
+
+
+@contextmanager
+def timed(stage):
+    """Times a pipeline stage into ats_stage_seconds and the request's Server-Timing list."""
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe('ats_stage_seconds', elapsed, stage=stage)
+        if has_request_context():
+            g.setdefault('stage_timings', []).append((stage, elapsed))
+
+
+def register_collector(fn, kind='gauge'):
+    """fn() -> [(name, labels dict, value)], read at scrape time (cache sizes etc.)."""
+    _collectors.append((fn, kind))
+    return fn
+
+
+def server_timing_header():
+    timings = g.get('stage_timings') if has_request_context() else None
+    if not timings:
+        return None
+    totals = {}  # stages hit more than once (e.g. vectorize) are summed, first-seen order kept
+    for stage, elapsed in timings:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ', '.join(f'{stage};dur={elapsed * 1000:.2f}' for stage, elapsed in totals.items())
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+
+def render():
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    seen = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f'# HELP {name} {_help[name]}')
+            lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name}{_fmt_labels(labels)} {value}')
+
+    for (name, labels), h in sorted(histograms.items()):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f'# HELP {name} {_help[name]}')
+            lines.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        for bound, count in zip(_bucket_defs[name], h):
+            cumulative += count
+            lines.append(f'{name}_bucket{_fmt_labels(labels, [("le", bound)])} {cumulative}')
+        lines.append(f'{name}_bucket{_fmt_labels(labels, [("le", "+Inf")])} {h[-1]}')
+        lines.append(f'{name}_sum{_fmt_labels(labels)} {h[-2]:.6f}')
+        lines.append(f'{name}_count{_fmt_labels(labels)} {h[-1]}')
+
+    for fn, kind in _collectors:
+        for name, labels, value in fn():
+            if name not in seen:
+                seen.add(name)
+                if name in _help:
+                    lines.append(f'# HELP {name} {_help[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name}{_fmt_labels(sorted(labels.items()))} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+describe('ats_stage_seconds', 'Time spent in each analysis pipeline stage.')
+describe('ats_request_seconds', 'Request latency by endpoint.')
+describe('ats_pdf_pages', 'Pages per extracted PDF.')
+describe('ats_cache_events_total', 'Cache lookups by cache and result (hit/miss).')
+describe('ats_cache_entries', 'Entries currently held by an in-memory cache.')
+describe('ats_cache_bytes', 'Estimated bytes held by an in-memory cache.')
+describe('ats_pdf_errors_total', 'PDFs that failed to extract.')
+describe('ats_duplicate_scans_total', 'Uploads answered with an earlier near-identical report.')
+describe('ats_model_reload_errors_total', 'Hot reloads that failed while the previous model kept serving.')
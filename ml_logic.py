@@ -1,142 +1,600 @@
+import hashlib
+import json
+import logging
+import os
 import pickle
 import re
 import string
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+import time
+import numpy as np
+import scipy.sparse as sp
+import metrics
+from cache import LRUCache
+from config import Config
+from skill_matcher import SkillMatcher
+
+logger = logging.getLogger(__name__)
 
 # Paths
-MODEL_PATH = 'models/ats_model.pkl'
-VECTORIZER_PATH = 'models/vectorizer.pkl'
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+TAXONOMY_PATH = os.path.join(BASE_DIR, 'models/skills_taxonomy.json')
 
-# Predefined Technical Skills Database
-TECHNICAL_SKILLS_DB = [
+# Fallback Technical Skills Database (used when the taxonomy file is missing)
+DEFAULT_SKILLS = [
     'python', 'java', 'javascript', 'c', 'sql', 'php', 'flask', 'html', 'css',
     'machine learning', 'random forest', 'xgboost', 'knn', 'data preprocessing', 'eda',
     'cybersecurity', 'ethical hacking', 'networking', 'operating systems', 'dbms',
     'encryption', 'firewalls', 'vpn', 'git', 'github', 'mysql', 'nlp'
 ]
 
+
+def load_skill_matcher(path=TAXONOMY_PATH):
+    """Compiles the skills taxonomy (canonical skill -> aliases) into a single-pass matcher."""
+    if os.path.exists(path):
+        return SkillMatcher.from_file(path)
+    return SkillMatcher({s: [] for s in DEFAULT_SKILLS})
+
+
+skill_matcher = load_skill_matcher()
+TECHNICAL_SKILLS_DB = skill_matcher.skills
+
+MMAP_FILES = ['meta.json', 'vocab_terms.npy', 'vocab_index.npy', 'idf.npy', 'coef.npy', 'intercept.npy', 'classes.npy']
+
+
+class MmapTfidf:
+    """TfidfVectorizer.transform() re-implemented over memory-mapped arrays.
+
+    The vocabulary is a sorted fixed-width string array (binary search instead
+    of a dict) and the IDF weights a float64 array, both opened with
+    mmap_mode='r' so every worker shares the same page-cache pages. Produces
+    the same vectors as the exported sklearn vectorizer.
+    """
+
+    def __init__(self, artifact_dir):
+        with open(os.path.join(artifact_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        self.terms = np.load(os.path.join(artifact_dir, 'vocab_terms.npy'), mmap_mode='r')
+        self.term_index = np.load(os.path.join(artifact_dir, 'vocab_index.npy'), mmap_mode='r')
+        self.idf = np.load(os.path.join(artifact_dir, 'idf.npy'), mmap_mode='r') if meta['use_idf'] else None
+        self.n_features = meta['n_features']
+        self.lowercase = meta['lowercase']
+        self.token_re = re.compile(meta['token_pattern'])
+        self.stop_words = frozenset(meta['stop_words']) if meta['stop_words'] else None
+        self.ngram_range = tuple(meta['ngram_range'])
+        self.norm = meta['norm']
+        self.binary = meta.get('binary', False)  # absent from exports made before it was recorded
+        self.sublinear_tf = meta['sublinear_tf']
+
+    def _analyze(self, doc):
+        if self.lowercase:
+            doc = doc.lower()
+        tokens = self.token_re.findall(doc)
+        if self.stop_words:
+            tokens = [t for t in tokens if t not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def _lookup(self, terms):
+        """Column index of each term, -1 when it is not in the vocabulary."""
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+        query = np.array(terms)
+        pos = np.searchsorted(self.terms, query)
+        pos = np.minimum(pos, len(self.terms) - 1)
+        found = self.terms[pos] == query
+        return np.where(found, self.term_index[pos], -1)
+
+    def transform(self, docs):
+        indptr, indices, data = [0], [], []
+        for doc in docs:
+            counts = {}
+            for term in self._analyze(doc):
+                counts[term] = counts.get(term, 0) + 1
+            cols = self._lookup(list(counts))
+            keep = cols >= 0
+            cols = cols[keep]
+            values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))[keep]
+            order = np.argsort(cols, kind='stable')
+            cols, values = cols[order], values[order]
+
+            if self.binary:
+                values = np.ones_like(values)
+            if self.sublinear_tf:
+                values = np.log(values) + 1.0
+            if self.idf is not None:
+                values = values * self.idf[cols]
+            if self.norm == 'l2' and len(values):
+                # sequential sum of squares, like sklearn's inplace_csr_row_normalize_l2
+                total = np.add.accumulate(values * values)[-1]
+                if total != 0:
+                    values = values / np.sqrt(total)
+            elif self.norm == 'l1' and len(values):
+                total = np.add.accumulate(np.abs(values))[-1]
+                if total != 0:
+                    values = values / total
+
+            indices.append(cols)
+            data.append(values)
+            indptr.append(indptr[-1] + len(cols))
+
+        data = np.concatenate(data) if data else np.zeros(0)
+        indices = np.concatenate(indices).astype(np.int32) if indices else np.zeros(0, dtype=np.int32)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, self.n_features))
+
+    def fingerprint(self):
+        h = hashlib.sha256()
+        order = np.argsort(self.term_index)
+        h.update('\n'.join(str(t) for t in self.terms[order]).encode('utf-8'))
+        if self.idf is not None:
+            h.update(np.ascontiguousarray(self.idf, dtype=np.float64).tobytes())
+        return h.hexdigest()
+
+
+class MmapLinearModel:
+    """predict / predict_proba of the exported binary or multinomial logistic regression."""
+
+    def __init__(self, artifact_dir):
+        self.coef_ = np.load(os.path.join(artifact_dir, 'coef.npy'), mmap_mode='r')
+        self.intercept_ = np.load(os.path.join(artifact_dir, 'intercept.npy'), mmap_mode='r')
+        self.classes_ = np.load(os.path.join(artifact_dir, 'classes.npy'), allow_pickle=False)
+
+    def decision_function(self, X):
+        scores = X @ self.coef_.T + self.intercept_
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1 - p, p])
+        scores = scores - scores.max(axis=1, keepdims=True)
+        e = np.exp(scores)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def vectorizer_fingerprint(tfidf):
+    """Hash of vocabulary + IDF: identical for a pickled vectorizer and its mmap export."""
+    if isinstance(tfidf, MmapTfidf):
+        return tfidf.fingerprint()
+    if not hasattr(tfidf, 'vocabulary_'):
+        return hashlib.sha256(repr(sorted(tfidf.get_params().items())).encode('utf-8')).hexdigest()
+    h = hashlib.sha256()
+    h.update('\n'.join(sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)).encode('utf-8'))
+    if getattr(tfidf, 'use_idf', False):
+        h.update(np.ascontiguousarray(tfidf.idf_, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """Loads the model + vectorizer once per process and hot-reloads them when the files change.
+
+    With model_format 'mmap' (or 'auto' and an export present) the artifacts are
+    the memory-mapped arrays from train_model.py --export instead of the pickles.
+    """
+
+    def __init__(self, model_path, vectorizer_path, check_interval=5.0, artifact_dir=None, model_format='pickle'):
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        self.artifact_dir = artifact_dir
+        self.model_format = model_format
+        self.check_interval = check_interval
+        self.version = 0
+        self.fingerprint = None
+        self._lock = threading.Lock()
+        self._artifacts = None
+        self._stamp = None
+        self._digest = None
+        self._last_check = 0.0
+
+    def _use_mmap(self):
+        if self.model_format == 'mmap':
+            return True
+        return (self.model_format == 'auto' and self.artifact_dir is not None
+                and os.path.exists(os.path.join(self.artifact_dir, 'meta.json')))
+
+    def _paths(self):
+        if self._use_mmap():
+            return [os.path.join(self.artifact_dir, name) for name in MMAP_FILES]
+        return [self.model_path, self.vectorizer_path]
+
+    def _file_stamp(self):
+        return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in self._paths())
+
+    def _file_digest(self):
+        h = hashlib.sha256()
+        for p in self._paths():
+            with open(p, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+        return h.hexdigest()
+
+    def _load(self):
+        with metrics.timed('model_load'):
+            if self._use_mmap():
+                return MmapLinearModel(self.artifact_dir), MmapTfidf(self.artifact_dir)
+            with open(self.model_path, 'rb') as f:
+                model = pickle.load(f)
+            with open(self.vectorizer_path, 'rb') as f:
+                tfidf = pickle.load(f)
+        return model, tfidf
+
+    def get(self):
+        """Returns (model, tfidf). Raises if the artifacts cannot be loaded.
+
+        A failed hot reload (e.g. a half-written file) keeps serving the last
+        good artifacts and is retried on the next check.
+        """
+        now = time.monotonic()
+        artifacts = self._artifacts
+        if artifacts is not None and now - self._last_check < self.check_interval:
+            return artifacts
+
+        with self._lock:
+            if self._artifacts is not None and now - self._last_check < self.check_interval:
+                return self._artifacts
+            try:
+                stamp = self._file_stamp()
+                if self._artifacts is None or stamp != self._stamp:
+                    # mtime/size moved: only reload when the content really changed
+                    digest = self._file_digest()
+                    if self._artifacts is None or digest != self._digest:
+                        artifacts = self._load()
+                        fingerprint = vectorizer_fingerprint(artifacts[1])
+                        self._artifacts, self._digest, self.fingerprint = artifacts, digest, fingerprint
+                        self.version += 1
+                    self._stamp = stamp
+            except Exception as e:
+                if self._artifacts is None:
+                    raise
+                # _stamp is left as it was, so the next check tries again
+                logger.error("Model reload failed, still serving the previous artifacts: %s", e)
+                metrics.inc('ats_model_reload_errors_total')
+            self._last_check = now
+            return self._artifacts
+
+    def warm_up(self):
+        self.get()
+        return self
+
+    @property
+    def digest(self):
+        """Content hash of the loaded artifact files (None before the first load)."""
+        return self._digest
+
+
+# Built from Config rather than by the app, so spawned pool workers load the same artifacts
+registry = ModelRegistry(Config.MODEL_PATH, Config.VECTORIZER_PATH, check_interval=Config.MODEL_RELOAD_INTERVAL,
+                         artifact_dir=Config.MODEL_ARTIFACT_DIR, model_format=Config.MODEL_FORMAT)
+
+
+def warm_up():
+    """Loads the artifacts eagerly, e.g. in the gunicorn master with --preload so forked workers share them."""
+    registry.warm_up()
+
+
+# Bump whenever the scoring rules or weights below change: `flask rescore` then
+# re-scores every stored scan tagged with an older version
+SCORING_VERSION = 1
+
+
+def scoring_version():
+    """Tag of everything a stored score depends on: scoring rules, vectorizer and skills taxonomy."""
+    registry.get()
+    key = f'{SCORING_VERSION}:{registry.fingerprint}:{skill_matcher.digest}'
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+_URL_RE = re.compile(r'http\S+\s*')
+_PUNCT_TO_SPACE = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
+_METRIC_RE = re.compile(r'\d+%|\$\d+')
+
+SECTION_KEYWORDS = {
+    'Experience': ['experience', 'work history', 'internship'],
+    'Education': ['education', 'academic', 'degree'],
+    'Skills': ['skills', 'technical proficiency', 'tools'],
+    'Projects': ['projects', 'portfolio']
+}
+IMPACT_VERBS = ['led', 'managed', 'developed', 'optimized', 'created', 'increased', 'reduced']
+
+
+def _tokens(lowered):
+    return _URL_RE.sub(' ', lowered).translate(_PUNCT_TO_SPACE).split()
+
+
 def clean_text(text):
     if not text: return ""
-    text = text.lower()
-    text = re.sub(r'http\S+\s*', ' ', text)
-    text = re.sub(r'[%s]' % re.escape(string.punctuation), ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    return ' '.join(_tokens(text.lower()))
 
 def detect_sections(text):
-    mapping = {
-        'Experience': ['experience', 'work history', 'internship'],
-        'Education': ['education', 'academic', 'degree'],
-        'Skills': ['skills', 'technical proficiency', 'tools'],
-        'Projects': ['projects', 'portfolio']
+    lowered = text.lower()
+    return [s for s, k in SECTION_KEYWORDS.items() if any(kw in lowered for kw in k)]
+
+class AnalyzedDocument:
+    """A resume tokenized once, with every count the two scoring modes read.
+
+    Built by `analyze_document`; calculate_ats_score, resume_features and the batch
+    scorer accept it in place of raw text, so a caller that needs several of them
+    (score, then store the search vector) pays for the text passes only once.
+    Keyword, verb and section hits keep the substring semantics of the original
+    scorer so reports are unchanged.
+    """
+    __slots__ = ('text', 'clean', 'word_count', 'sections', 'skills',
+                 'verb_count', 'metric_count', '_vector', '_vectorizer')
+
+    def __init__(self, text):
+        text = text or ""
+        self.text = text
+        lowered = text.lower()
+        tokens = _tokens(lowered)
+        self.clean = ' '.join(tokens)
+        self.word_count = len(text.split())
+        self.sections = [s for s, k in SECTION_KEYWORDS.items() if any(kw in lowered for kw in k)]
+        self.skills = skill_matcher.find(tokens)
+        self.verb_count = sum(1 for v in IMPACT_VERBS if v in self.clean)
+        self.metric_count = len(_METRIC_RE.findall(text))
+        self._vector = None
+        self._vectorizer = None
+
+    def vectorize(self, tfidf):
+        """1 x n_features TF-IDF row, computed once per vectorizer."""
+        if self._vectorizer is not tfidf:
+            with metrics.timed('vectorize'):
+                self._vector = tfidf.transform([self.clean]).tocsr()
+            self._vectorizer = tfidf
+        return self._vector
+
+
+def analyze_document(resume):
+    """AnalyzedDocument for raw resume text; documents are passed through."""
+    if isinstance(resume, AnalyzedDocument):
+        return resume
+    return AnalyzedDocument(resume)
+
+class JDFeatures:
+    """Everything the JD side of the score needs, computed once per distinct JD."""
+    __slots__ = ('clean', 'vector', 'skills', 'vectorizer', 'nbytes')
+
+    def __init__(self, clean, vector, skills, vectorizer):
+        self.clean = clean
+        self.vector = vector
+        self.skills = skills
+        self.vectorizer = vectorizer  # the vector is only valid for this exact vectorizer
+        self.nbytes = (len(clean) + vector.data.nbytes + vector.indices.nbytes
+                       + vector.indptr.nbytes + 64 * len(skills) + 256)
+
+
+# Many applicants are scored against the same posting; keep its artifacts around
+jd_cache = LRUCache(maxsize=2048, max_bytes=32 * 1024 * 1024, sizeof=lambda f: f.nbytes)
+_jd_cache_version = 0
+
+
+def jd_cache_key(jd_text):
+    normalized = ' '.join(jd_text.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def get_jd_features(jd_text, tfidf):
+    global _jd_cache_version
+    # Vectors depend on the vocabulary: drop everything when the registry reloaded
+    if _jd_cache_version != registry.version:
+        jd_cache.clear()
+        _jd_cache_version = registry.version
+
+    key = jd_cache_key(jd_text)
+    features = jd_cache.get(key)
+    if features is not None and features.vectorizer is not tfidf:
+        # Put by a request still holding the previous vectorizer after the clear above
+        features = None
+    metrics.inc('ats_cache_events_total', cache='jd', result='miss' if features is None else 'hit')
+    if features is None:
+        clean_jd = clean_text(jd_text)
+        with metrics.timed('vectorize'):
+            vector = tfidf.transform([clean_jd]).tocsr()
+        features = JDFeatures(clean_jd, vector, skill_matcher.find(clean_jd), tfidf)
+        jd_cache.put(key, features)
+    return features
+
+
+@metrics.register_collector
+def _jd_cache_gauges():
+    return [('ats_cache_entries', {'cache': 'jd'}, len(jd_cache)),
+            ('ats_cache_bytes', {'cache': 'jd'}, jd_cache.nbytes)]
+
+
+SECTION_NAMES = ['Experience', 'Education', 'Skills', 'Projects']
+
+
+def _jd_match_report(cosine_sim, jd_skills, missing_skills, found_sections):
+    suggestions = []
+    matched = len(jd_skills) - len(missing_skills)
+    skill_score = (matched / len(jd_skills)) if jd_skills else 1.0
+    struct_score = (len(found_sections) / 4.0)
+
+    # Weighted Score
+    final_score = (cosine_sim * 45) + (skill_score * 35) + (struct_score * 20)
+
+    # Deductive Penalties for missing critical skills
+    if len(missing_skills) >= 3: final_score -= 25
+    elif len(missing_skills) == 2: final_score -= 15
+
+    if missing_skills:
+        suggestions.append(f"Hard Skill Gap: Add {', '.join(missing_skills[:3])}.")
+    if cosine_sim < 0.3:
+        suggestions.append("Industry Language: Use more keywords from the JD in your summary.")
+
+    return {
+        "score": round(max(5, min(98, final_score)), 1),
+        "recommendation": "Strong Match" if final_score >= 70 else "Potential Fit",
+        "match_details": {
+            "semantic_overlap": round(cosine_sim * 100, 1),
+            "structure_score": round(struct_score * 100, 1)
+        },
+        "missing_skills": missing_skills,
+        "sections_found": found_sections,
+        "missing_sections": [s for s in SECTION_NAMES if s not in found_sections],
+        "suggestions": suggestions
+    }
+
+
+def _resume_audit(doc):
+    suggestions = []
+    found_sections = doc.sections
+
+    # PILLAR 1: STRUCTURE (25 Points)
+    struct_score = (len(found_sections) / 4.0) * 25
+    if len(found_sections) < 4:
+        missing = [s for s in SECTION_NAMES if s not in found_sections]
+        suggestions.append(f"Structure: missing {', '.join(missing)} sections.")
+
+    # PILLAR 2: SKILLS STRENGTH (25 Points)
+    skill_score = min(len(doc.skills) * 2.5, 25)
+    if len(doc.skills) < 6:
+        suggestions.append("Skills: Increase technical keyword density.")
+
+    # PILLAR 3: EXPERIENCE DEPTH (25 Points)
+    has_metrics = doc.metric_count > 0
+    exp_score = min(doc.verb_count * 3, 15) + (10 if has_metrics else 0)
+    if not has_metrics:
+        suggestions.append("Experience: Use numbers (%, $) to quantify achievements.")
+
+    # PILLAR 4: ATS READABILITY (25 Points)
+    word_count = doc.word_count
+    readability_score = 0
+    if 400 <= word_count <= 800:
+        readability_score = 25
+    elif 200 <= word_count < 400:
+        readability_score = 15
+        suggestions.append("Readability: Content is thin. Expand your details.")
+    else:
+        readability_score = 10
+        suggestions.append("Readability: Resume length is sub-optimal.")
+
+    total_score = struct_score + skill_score + exp_score + readability_score
+
+    return {
+        "score": round(total_score, 1),
+        "recommendation": "Professional" if total_score >= 75 else "Needs Polish",
+        "match_details": None,
+        "breakdown": {
+            "structure": round(struct_score, 1),
+            "skills": round(skill_score, 1),
+            "experience": round(exp_score, 1),
+            "readability": round(readability_score, 1)
+        },
+        "suggestions": suggestions,
+        "sections_found": found_sections,
+        "missing_sections": [s for s in SECTION_NAMES if s not in found_sections]
     }
-    found = [s for s, k in mapping.items() if any(kw in text.lower() for kw in k)]
-    return found
 
-def calculate_ats_score(resume_text, jd_text=None):
-    # Load ML Model and Vectorizer
+
+def calculate_ats_score(resume, jd_text=None):
+    """Scores resume text (or an AnalyzedDocument) against a JD, or audits it alone."""
+    # Load ML Model and Vectorizer (cached per process)
     try:
-        with open(MODEL_PATH, 'rb') as f:
-            model = pickle.load(f)
-        with open(VECTORIZER_PATH, 'rb') as f:
-            tfidf = pickle.load(f)
+        model, tfidf = registry.get()
     except Exception as e:
         return {"error": f"Model files missing or corrupted: {e}"}
 
-    clean_resume = clean_text(resume_text)
-    found_sections = detect_sections(resume_text)
-    suggestions = []
+    doc = analyze_document(resume)
 
     if jd_text:
         # --- MODE 1: JOB DESCRIPTION MATCHING ---
-        clean_jd = clean_text(jd_text)
-        
+        jd = get_jd_features(jd_text, tfidf)
+
         # Calculate Cosine Similarity
-        vecs = tfidf.transform([clean_resume, clean_jd])
-        cosine_sim = float(cosine_similarity(vecs[0:1], vecs[1:2])[0][0])
-        
+        cosine_sim = float(_cosine_matrix(doc.vectorize(tfidf), jd.vector, tfidf)[0, 0])
+
         # Skill Intersection
-        jd_skills = [s for s in TECHNICAL_SKILLS_DB if s in clean_jd]
-        resume_skills = [s for s in TECHNICAL_SKILLS_DB if s in clean_resume]
+        jd_skills = jd.skills
+        resume_skills = set(doc.skills)
         missing_skills = [s for s in jd_skills if s not in resume_skills]
 
-        skill_score = (len([s for s in jd_skills if s in resume_skills]) / len(jd_skills)) if jd_skills else 1.0
-        struct_score = (len(found_sections) / 4.0)
-
-        # Weighted Score
-        final_score = (cosine_sim * 45) + (skill_score * 35) + (struct_score * 20)
-        
-        # Deductive Penalties for missing critical skills
-        if len(missing_skills) >= 3: final_score -= 25
-        elif len(missing_skills) == 2: final_score -= 15
-
-        if missing_skills:
-            suggestions.append(f"Hard Skill Gap: Add {', '.join(missing_skills[:3])}.")
-        if cosine_sim < 0.3:
-            suggestions.append("Industry Language: Use more keywords from the JD in your summary.")
-
-        return {
-            "score": round(max(5, min(98, final_score)), 1),
-            "recommendation": "Strong Match" if final_score >= 70 else "Potential Fit",
-            "match_details": {
-                "semantic_overlap": round(cosine_sim * 100, 1), 
-                "structure_score": round(struct_score * 100, 1)
-            },
-            "missing_skills": missing_skills,
-            "sections_found": found_sections,
-            "missing_sections": [s for s in ['Experience', 'Education', 'Skills', 'Projects'] if s not in found_sections],
-            "suggestions": suggestions
-        }
+        return _jd_match_report(cosine_sim, jd_skills, missing_skills, doc.sections)
 
-    else:
-        # --- MODE 2: RESUME-ONLY QUALITY AUDIT ---
-        
-        # PILLAR 1: STRUCTURE (25 Points)
-        struct_score = (len(found_sections) / 4.0) * 25
-        if len(found_sections) < 4:
-            missing = [s for s in ['Experience', 'Education', 'Skills', 'Projects'] if s not in found_sections]
-            suggestions.append(f"Structure: missing {', '.join(missing)} sections.")
-
-        # PILLAR 2: SKILLS STRENGTH (25 Points)
-        resume_skills = [s for s in TECHNICAL_SKILLS_DB if s in clean_resume]
-        skill_score = min(len(resume_skills) * 2.5, 25) 
-        if len(resume_skills) < 6:
-            suggestions.append("Skills: Increase technical keyword density.")
-
-        # PILLAR 3: EXPERIENCE DEPTH (25 Points)
-        impact_verbs = ['led', 'managed', 'developed', 'optimized', 'created', 'increased', 'reduced']
-        verb_count = len([v for v in impact_verbs if v in clean_resume])
-        has_metrics = len(re.findall(r'\d+%', resume_text)) > 0 or len(re.findall(r'\$\d+', resume_text)) > 0
-        
-        exp_score = min(verb_count * 3, 15) + (10 if has_metrics else 0)
-        if not has_metrics:
-            suggestions.append("Experience: Use numbers (%, $) to quantify achievements.")
-
-        # PILLAR 4: ATS READABILITY (25 Points)
-        word_count = len(resume_text.split())
-        readability_score = 0
-        if 400 <= word_count <= 800:
-            readability_score = 25
-        elif 200 <= word_count < 400:
-            readability_score = 15
-            suggestions.append("Readability: Content is thin. Expand your details.")
-        else:
-            readability_score = 10
-            suggestions.append("Readability: Resume length is sub-optimal.")
-
-        total_score = struct_score + skill_score + exp_score + readability_score
-
-        return {
-            "score": round(total_score, 1),
-            "recommendation": "Professional" if total_score >= 75 else "Needs Polish",
-            "match_details": None, 
-            "breakdown": {
-                "structure": round(struct_score, 1),
-                "skills": round(skill_score, 1),
-                "experience": round(exp_score, 1),
-                "readability": round(readability_score, 1)
-            },
-            "suggestions": suggestions,
-            "sections_found": found_sections,
-            "missing_sections": [s for s in ['Experience', 'Education', 'Skills', 'Projects'] if s not in found_sections]
-        }
\ No newline at end of file
+    # --- MODE 2: RESUME-ONLY QUALITY AUDIT ---
+    return _resume_audit(doc)
+
+
+def resume_features(resume):
+    """(1 x n_features TF-IDF row, matched skills) of a resume, as stored by the search index."""
+    model, tfidf = registry.get()
+    doc = analyze_document(resume)
+    return doc.vectorize(tfidf), doc.skills
+
+
+def _cosine_matrix(rows_a, rows_b, tfidf):
+    """Cosine similarities of two sparse row sets. sklearn is not imported: the
+    vectorizer already L2-normalises its rows, so this is a sparse dot product."""
+    if getattr(tfidf, 'norm', None) != 'l2':
+        rows_a, rows_b = _l2_normalize(rows_a), _l2_normalize(rows_b)
+    return (rows_a @ rows_b.T).toarray()
+
+
+def _l2_normalize(rows):
+    norms = np.sqrt(np.asarray(rows.multiply(rows).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.diags(1.0 / norms) @ rows
+
+
+def _skill_matrix(skill_lists):
+    """Boolean (documents x taxonomy) incidence matrix of matched skills."""
+    rank = {s: i for i, s in enumerate(TECHNICAL_SKILLS_DB)}
+    m = np.zeros((len(skill_lists), len(rank)), dtype=bool)
+    for row, skills in enumerate(skill_lists):
+        m[row, [rank[s] for s in skills]] = True
+    return m
+
+
+def calculate_ats_scores_batch(resumes, jd_texts=None):
+    """Scores every resume against every JD in one vectorised pass.
+
+    Returns a len(resumes) x len(jd_texts) nested list of reports (one row per
+    resume). Each entry is identical to calculate_ats_score(resume, jd), so an
+    empty JD keeps its column with the resume-only audit. Without JDs each row
+    holds a single audit.
+    """
+    try:
+        model, tfidf = registry.get()
+    except Exception as e:
+        return {"error": f"Model files missing or corrupted: {e}"}
+
+    docs = [analyze_document(r) for r in resumes]
+    jd_texts = list(jd_texts or [])
+
+    if not jd_texts:
+        return [[_resume_audit(doc)] for doc in docs]
+
+    # Columns stay aligned with jd_texts: empty JDs are filled with audits, the rest matched below
+    results = [[None if jd else _resume_audit(doc) for jd in jd_texts] for doc in docs]
+    cols = [j for j, jd in enumerate(jd_texts) if jd]
+    if not cols:
+        return results
+    jds = [get_jd_features(jd_texts[j], tfidf) for j in cols]
+
+    # One sparse transform for all resumes, one product for the whole similarity matrix
+    n = len(docs)
+    with metrics.timed('vectorize'):
+        resume_vecs = tfidf.transform([doc.clean for doc in docs])
+    sims = _cosine_matrix(resume_vecs, sp.vstack([jd.vector for jd in jds], format='csr'), tfidf)
+
+    # Skill sets as incidence matrices: missing[i, j] = skills in JD j absent from resume i
+    resume_sk = _skill_matrix([doc.skills for doc in docs])
+    jd_sk = _skill_matrix([jd.skills for jd in jds])
+    jd_skill_names = [[TECHNICAL_SKILLS_DB[k] for k in np.flatnonzero(row)] for row in jd_sk]
+
+    for i in range(n):
+        missing = jd_sk & ~resume_sk[i]
+        for j, col in enumerate(cols):
+            missing_skills = [TECHNICAL_SKILLS_DB[k] for k in np.flatnonzero(missing[j])]
+            results[i][col] = _jd_match_report(float(sims[i, j]), jd_skill_names[j], missing_skills,
+                                               docs[i].sections)
+    return results
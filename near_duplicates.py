@@ -0,0 +1,173 @@
+import hashlib
+import threading
+import zlib
+
+import numpy as np
+
+from database import ResumeSignature
+from ml_logic import jd_cache_key
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard collide in at least one band
+SHINGLE = 3
+EMPTY = 0xFFFFFFFF  # every slot of the signature of a document without tokens
+
+
+def _odd_uint64(rng, n):
+    return rng.integers(1, 2 ** 63, size=n, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+class MinHasher:
+    """MinHash signatures of word shingles.
+
+    Tokens are hashed once with crc32 and combined into shingle hashes
+    arithmetically; the NUM_PERM hash functions are multiply-shift hashes
+    ((a * x + b) mod 2^64) >> 32, evaluated for all shingles in one NumPy pass.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, shingle=SHINGLE, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self._a = _odd_uint64(rng, num_perm)[:, None]
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)[:, None]
+        self._mix = _odd_uint64(rng, shingle)
+
+    def signature(self, tokens):
+        """uint32[num_perm] signature of a token list (e.g. AnalyzedDocument.clean.split())."""
+        if not tokens:
+            return np.full(self.num_perm, EMPTY, dtype=np.uint32)
+        h = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens), dtype=np.uint64, count=len(tokens))
+        n = max(len(h) - self.shingle + 1, 1)
+        shingles = np.zeros(n, dtype=np.uint64)
+        for k in range(min(self.shingle, len(h))):
+            shingles += h[k:k + n] * self._mix[k]
+        with np.errstate(over='ignore'):
+            hashed = (self._a * shingles[None, :] + self._b) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+
+def is_empty(signature):
+    """True for the signature of an empty document (all such documents would 'match')."""
+    return bool((signature == EMPTY).all())
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+def scope_key(*parts):
+    """Hex digest naming the comparison scope (user, JD, model): only equal scopes can match."""
+    return hashlib.sha256('\x1f'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:16]
+
+
+def resume_scope(user_id, jd_text, model_version):
+    """Scope of a scan: the same user's resumes scored against the same JD by the same model."""
+    jd_key = jd_cache_key(jd_text) if jd_text and jd_text.strip() else ''
+    return scope_key(user_id, jd_key, model_version)
+
+
+class NearDuplicateIndex:
+    """Locality-sensitive hash index over stored MinHash signatures.
+
+    Each signature is cut into `bands` bands; a band and the document's scope
+    hash to one uint64 key. Keys live in sorted NumPy arrays (with a parallel
+    array of history ids), appended in blocks that are merged LSM-style like
+    ResumeIndex, so a lookup is a handful of binary searches whatever the
+    corpus size and memory stays at ~12 bytes per band per document. The
+    ResumeSignature table is the source of truth; `sync` pulls new rows by
+    keyset on history_id.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=2):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._row_mix = _odd_uint64(rng, self.rows)
+        self._band_salt = rng.integers(0, 2 ** 63, size=bands, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._blocks = []  # [(sorted uint64 keys, uint32 history ids)]
+        self.last_id = 0
+
+    def __len__(self):
+        return sum(len(b[0]) for b in self._blocks) // self.bands
+
+    def band_keys(self, signatures, scopes):
+        """(n, bands) uint64 keys for an (n, num_perm) signature matrix and n scope hex strings."""
+        sigs = np.asarray(signatures, dtype=np.uint64).reshape(len(scopes), self.bands, self.rows)
+        scope = np.array([int(s, 16) for s in scopes], dtype=np.uint64)[:, None]
+        with np.errstate(over='ignore'):
+            keys = (sigs * self._row_mix).sum(axis=2, dtype=np.uint64)
+            keys ^= scope + self._band_salt
+            keys *= np.uint64(0x9E3779B97F4A7C15)
+            keys ^= keys >> np.uint64(31)
+        return keys
+
+    def sync(self, session, batch_size=20000):
+        """Appends ResumeSignature rows newer than the last synced id."""
+        with self._lock:
+            while True:
+                rows = (session.query(ResumeSignature.history_id, ResumeSignature.scope, ResumeSignature.signature)
+                        .filter(ResumeSignature.history_id > self.last_id)
+                        .order_by(ResumeSignature.history_id).limit(batch_size).all())
+                if not rows:
+                    break
+                sigs = np.frombuffer(b''.join(r.signature for r in rows), dtype=np.uint32)
+                self.add([r.history_id for r in rows], sigs, [r.scope for r in rows])
+                self.last_id = rows[-1].history_id
+
+    def add(self, history_ids, signatures, scopes):
+        keys = self.band_keys(signatures, scopes).ravel()
+        ids = np.repeat(np.asarray(history_ids, dtype=np.uint32), self.bands)
+        order = np.argsort(keys, kind='stable')
+        blocks = list(self._blocks)
+        blocks.append((keys[order], ids[order]))
+        while len(blocks) > 1 and len(blocks[-2][0]) <= 2 * len(blocks[-1][0]):
+            b, a = blocks.pop(), blocks.pop()
+            merged = np.concatenate([a[0], b[0]])
+            order = np.argsort(merged, kind='stable')
+            blocks.append((merged[order], np.concatenate([a[1], b[1]])[order]))
+        self._blocks = blocks
+
+    def candidates(self, signature, scope):
+        """History ids sharing at least one band with `signature` in the same scope."""
+        keys = self.band_keys(signature[None, :], [scope])[0]
+        found = []
+        for block_keys, block_ids in self._blocks:
+            lo = np.searchsorted(block_keys, keys, 'left')
+            hi = np.searchsorted(block_keys, keys, 'right')
+            for start, stop in zip(lo[lo < hi], hi[lo < hi]):
+                found.append(block_ids[start:stop])
+        if not found:
+            return []
+        return np.unique(np.concatenate(found)).tolist()
+
+    def best_match(self, session, signature, scope, max_candidates=256):
+        """(history_id, similarity) of the closest stored resume in `scope`, or (None, 0.0).
+
+        Candidates are re-checked against their stored signatures, which also
+        drops rows deleted since they were indexed. Ties go to the newest scan.
+        """
+        ids = self.candidates(signature, scope)[-max_candidates:]
+        best = (None, 0.0)
+        if not ids:
+            return best
+        rows = (session.query(ResumeSignature.history_id, ResumeSignature.signature)
+                .filter(ResumeSignature.history_id.in_(ids), ResumeSignature.scope == scope)
+                .order_by(ResumeSignature.history_id))
+        for history_id, blob in rows:
+            sim = similarity(np.frombuffer(blob, dtype=np.uint32), signature)
+            if sim >= best[1]:
+                best = (history_id, sim)
+        return best
+
+
+def signature_fields(signature, scope):
+    return {"scope": scope, "signature": signature.astype(np.uint32).tobytes()}
+
+
+def signature_row(history_id, signature, scope):
+    return ResumeSignature(history_id=history_id, **signature_fields(signature, scope))
@@ -0,0 +1,46 @@
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # falls back to compressed JSON
+    msgpack = None
+
+# First byte of every stored blob says how the rest is encoded
+FORMAT_ZLIB_JSON = 1
+FORMAT_ZLIB_MSGPACK = 2
+
+COMPRESSION_LEVEL = 6
+
+
+def encode_report(report, fmt=None):
+    """dict -> bytes: one format byte followed by the zlib-compressed payload."""
+    if fmt is None:
+        fmt = FORMAT_ZLIB_MSGPACK if msgpack is not None else FORMAT_ZLIB_JSON
+    if fmt == FORMAT_ZLIB_MSGPACK:
+        payload = msgpack.packb(report, use_bin_type=True)
+    elif fmt == FORMAT_ZLIB_JSON:
+        payload = json.dumps(report, separators=(',', ':')).encode('utf-8')
+    else:
+        raise ValueError(f"Unknown report format: {fmt}")
+    return bytes([fmt]) + zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def encode_text(text):
+    """str -> zlib-compressed UTF-8, for the resume/JD text kept with each scan."""
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decode_text(blob):
+    return zlib.decompress(blob).decode('utf-8')
+
+
+def decode_report(blob):
+    fmt, payload = blob[0], zlib.decompress(blob[1:])
+    if fmt == FORMAT_ZLIB_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("msgpack is required to read this report")
+        return msgpack.unpackb(payload, raw=False)
+    if fmt == FORMAT_ZLIB_JSON:
+        return json.loads(payload)
+    raise ValueError(f"Unknown report format: {fmt}")
@@ -0,0 +1,132 @@
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from database import ResumeVector
+
+
+class ResumeIndex:
+    """In-memory top-k index over every analysed resume.
+
+    Rows are the stored TF-IDF vectors (L2-normalised, so a dot product is the
+    cosine similarity) and a boolean doc x skill matrix kept in CSC form, whose
+    columns are the posting lists of the inverted skill index. The ResumeVector
+    table is the source of truth shared by all workers; `sync` pulls rows added
+    since the last call (keyset on history_id), so the index grows incrementally.
+
+    New rows land in small blocks that are merged LSM-style (a block is merged
+    into its predecessor once it is at least half its size), so appending stays
+    amortised O(log n) copies instead of rebuilding the whole matrix per upload.
+    """
+
+    def __init__(self, n_features, skills):
+        self.n_features = n_features
+        self.skills = list(skills)
+        self._skill_col = {s: i for i, s in enumerate(self.skills)}
+        self.model_version = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._blocks = []  # [(ids, tfidf csr, skill csc)]
+        self.last_id = 0
+
+    def __len__(self):
+        return sum(len(b[0]) for b in self._blocks)
+
+    def sync(self, session, model_version, batch_size=5000):
+        """Appends ResumeVector rows newer than the last synced id."""
+        with self._lock:
+            if model_version != self.model_version:
+                # vectors from another vocabulary are not comparable: start over
+                self._reset()
+                self.model_version = model_version
+            while True:
+                rows = (session.query(ResumeVector)
+                        .filter(ResumeVector.history_id > self.last_id,
+                                ResumeVector.model_version == model_version)
+                        .order_by(ResumeVector.history_id).limit(batch_size).all())
+                if not rows:
+                    break
+                self._append(rows)
+                self.last_id = rows[-1].history_id
+
+    def _append(self, rows):
+        indptr, indices, data = [0], [], []
+        sk_rows, sk_cols = [], []
+        for r, row in enumerate(rows):
+            term_ids = np.frombuffer(row.term_ids, dtype=np.int32)
+            indices.append(term_ids)
+            data.append(np.frombuffer(row.weights, dtype=np.float32))
+            indptr.append(indptr[-1] + len(term_ids))
+            for skill in (row.skills or '').split(','):
+                col = self._skill_col.get(skill)
+                if col is not None:
+                    sk_rows.append(r)
+                    sk_cols.append(col)
+
+        block = sp.csr_matrix((np.concatenate(data), np.concatenate(indices), indptr),
+                              shape=(len(rows), self.n_features))
+        skills = sp.csc_matrix((np.ones(len(sk_rows), dtype=bool), (sk_rows, sk_cols)),
+                               shape=(len(rows), len(self.skills)))
+        blocks = list(self._blocks)
+        blocks.append((np.array([row.history_id for row in rows], dtype=np.int64), block, skills))
+        while len(blocks) > 1 and len(blocks[-2][0]) <= 2 * len(blocks[-1][0]):
+            b, a = blocks.pop(), blocks.pop()
+            blocks.append((np.concatenate([a[0], b[0]]),
+                           sp.vstack([a[1], b[1]], format='csr'),
+                           sp.vstack([a[2], b[2]], format='csc')))
+        self._blocks = blocks
+
+    def search(self, query_vector, k=10, required_skills=None, allowed_ids=None):
+        """Returns [(history_id, similarity)] of the k best rows, best first.
+
+        With `allowed_ids`, only those history ids are considered (e.g. one user's scans).
+        """
+        blocks = self._blocks
+        if not blocks or k <= 0:
+            return []
+        cols = None
+        if required_skills:
+            cols = sorted({self._skill_col[s] for s in required_skills if s in self._skill_col})
+            if len(cols) < len(set(required_skills)):
+                return []
+
+        # One sparse matrix-vector product per block scores every stored resume
+        query = np.asarray(query_vector.todense(), dtype=np.float32).ravel()
+        ids = np.concatenate([b[0] for b in blocks])
+        scores = np.concatenate([b[1].dot(query) for b in blocks])
+
+        if cols:
+            # Intersect the posting lists of the required skills
+            hits = np.concatenate([np.asarray(b[2][:, cols].sum(axis=1)).ravel() for b in blocks])
+            candidates = np.flatnonzero(hits == len(cols))
+        else:
+            candidates = np.arange(len(ids))
+        if allowed_ids is not None:
+            candidates = candidates[np.isin(ids[candidates], np.asarray(allowed_ids, dtype=np.int64))]
+        if not len(candidates):
+            return []
+
+        # Partial sort: only the top k are ordered
+        cand_scores = scores[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-cand_scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-cand_scores[top], kind='stable')]
+        return [(int(ids[candidates[i]]), float(cand_scores[i])) for i in top]
+
+
+def vector_fields(vector, skills, model_version):
+    """ResumeVector column values for a 1 x n_features sparse TF-IDF vector."""
+    vector = vector.tocsr()
+    return {"model_version": model_version,
+            "term_ids": vector.indices.astype(np.int32).tobytes(),
+            "weights": vector.data.astype(np.float32).tobytes(),
+            "skills": ','.join(skills)}
+
+
+def vector_row(history_id, vector, skills, model_version):
+    return ResumeVector(history_id=history_id, **vector_fields(vector, skills, model_version))
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import string
+
+_PUNCT_TO_SPACE = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
+
+
+class SkillMatcher:
+    """Token-trie matcher for the skills taxonomy.
+
+    Skills and their aliases are compiled once into a trie keyed by whole tokens,
+    so a single left-to-right pass over the cleaned text finds every hit and a
+    skill can never match inside another word ('java' in 'javascript').
+    """
+
+    def __init__(self, taxonomy):
+        # taxonomy: {canonical skill: [aliases]}, canonical order is kept for output
+        self.skills = list(taxonomy)
+        # Identifies the taxonomy a stored score was computed with (see ml_logic.scoring_version)
+        self.digest = hashlib.sha256(json.dumps(taxonomy, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        self._rank = {s: i for i, s in enumerate(self.skills)}
+        self._trie = {}
+        for skill, aliases in taxonomy.items():
+            for phrase in [skill] + list(aliases or []):
+                self._add(phrase, skill)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {s: [] for s in data}
+        return cls(data)
+
+    def _add(self, phrase, skill):
+        # normalise the same way clean_text does, so 'k-nearest' matches 'k nearest'
+        tokens = phrase.lower().translate(_PUNCT_TO_SPACE).split()
+        if not tokens:
+            return
+        node = self._trie
+        for tok in tokens:
+            node = node.setdefault(tok, {})
+        node[None] = skill
+
+    def find(self, text):
+        """Returns the canonical skills found in cleaned text (or a token list), in taxonomy order."""
+        tokens = text.split() if isinstance(text, str) else text
+        trie = self._trie
+        found = set()
+        for i in range(len(tokens)):
+            node = trie.get(tokens[i])
+            j = i + 1
+            while node is not None:
+                skill = node.get(None)
+                if skill is not None:
+                    found.add(skill)
+                if j >= len(tokens):
+                    break
+                node = node.get(tokens[j])
+                j += 1
+        return sorted(found, key=self._rank.__getitem__)
+
+    def __len__(self):
+        return len(self.skills)
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Flat layout: the application modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config reads these at import time; keep the tests away from resume_data.db and cache.db
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='ats-tests-'), 'cache.db'))
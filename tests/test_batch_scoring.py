@@ -0,0 +1,60 @@
+import pytest
+
+from ml_logic import calculate_ats_score, calculate_ats_scores_batch
+
+RESUMES = [
+    "Jane Doe\nSoftware Engineer\nExperience\nBuilt Flask and Django APIs in Python, "
+    "deployed on AWS with Docker. Improved latency by 40%.\nEducation\nBSc Computer Science\n"
+    "Skills\nPython, SQL, Docker, AWS, Git",
+    "John Smith\nData Analyst\nExperience\nCreated Tableau dashboards and Excel reports, "
+    "led a team of 4.\nSkills\nSQL, Excel, Tableau, Power BI",
+    "Short resume with no sections",
+]
+JDS = [
+    "Backend engineer: Python, Flask, PostgreSQL, Docker and Kubernetes on AWS.",
+    "Data analyst with SQL, Tableau and Excel; Python is a plus.",
+]
+
+
+def single_pairs(resumes, jds):
+    return [[calculate_ats_score(r, jd) for jd in jds] for r in resumes]
+
+
+def test_batch_equals_single_pair_scores():
+    assert calculate_ats_scores_batch(RESUMES, JDS) == single_pairs(RESUMES, JDS)
+
+
+def test_empty_jd_keeps_its_column():
+    jds = [JDS[0], "", JDS[1]]
+    batch = calculate_ats_scores_batch(RESUMES, jds)
+    assert [len(row) for row in batch] == [len(jds)] * len(RESUMES)
+    assert batch == single_pairs(RESUMES, jds)
+
+
+def test_without_jds_each_row_is_an_audit():
+    assert calculate_ats_scores_batch(RESUMES) == [[calculate_ats_score(r)] for r in RESUMES]
+
+
+@pytest.fixture(scope='module')
+def client():
+    from app import app
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    client.post('/register', data={'username': 'batch', 'email': 'batch@example.com', 'password': 'pw'})
+    client.post('/login', data={'username': 'batch', 'password': 'pw'})
+    return client
+
+
+def test_api_matches_single_pair_scores(client):
+    response = client.post('/api/batch_score', json={'resumes': RESUMES, 'job_descriptions': JDS})
+    assert response.status_code == 200
+    scores = [[report['score'] for report in row] for row in response.get_json()['results']]
+    assert scores == [[report['score'] for report in row] for row in single_pairs(RESUMES, JDS)]
+
+
+@pytest.mark.parametrize('payload', [
+    {'resumes': RESUMES, 'job_descriptions': [JDS[0], '', JDS[1]]},
+    {'resumes': [RESUMES[0], '   '], 'job_descriptions': JDS},
+])
+def test_api_rejects_empty_entries(client, payload):
+    assert client.post('/api/batch_score', json=payload).status_code == 400
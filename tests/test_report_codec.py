@@ -0,0 +1,46 @@
+import zlib
+
+import pytest
+
+import report_codec
+from report_codec import (FORMAT_ZLIB_JSON, FORMAT_ZLIB_MSGPACK, decode_report, decode_text,
+                          encode_report, encode_text)
+
+REPORT = {
+    "score": 73.25,
+    "matched_skills": ["python", "machine learning"],
+    "missing_skills": [],
+    "audit": {"word_count": 412, "has_email": True, "sections": {"experience": 1, "projects": None}},
+    "summary": "Strong fit — résumé covers most of the JD",
+}
+
+FORMATS = [FORMAT_ZLIB_JSON]
+if report_codec.msgpack is not None:
+    FORMATS.append(FORMAT_ZLIB_MSGPACK)
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_report_round_trip(fmt):
+    blob = encode_report(REPORT, fmt)
+    assert blob[0] == fmt
+    assert decode_report(blob) == REPORT
+
+
+def test_default_format_round_trips():
+    blob = encode_report(REPORT)
+    expected = FORMAT_ZLIB_MSGPACK if report_codec.msgpack is not None else FORMAT_ZLIB_JSON
+    assert blob[0] == expected
+    assert decode_report(blob) == REPORT
+
+
+def test_text_round_trip():
+    text = "Senior engineer\n\u2022 Python, SQL\n\u2022 caf\u00e9 ops"
+    assert decode_text(encode_text(text)) == text
+    assert decode_text(encode_text("")) == ""
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        encode_report(REPORT, 9)
+    with pytest.raises(ValueError):
+        decode_report(bytes([9]) + zlib.compress(b"{}"))
@@ -0,0 +1,31 @@
+import pytest
+
+JD = "Backend engineer: Python, Flask, PostgreSQL and machine learning on AWS."
+
+
+@pytest.fixture(scope='module')
+def client():
+    from app import app
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    client.post('/register', data={'username': 'search', 'email': 'search@example.com', 'password': 'pw'})
+    client.post('/login', data={'username': 'search', 'password': 'pw'})
+    return client
+
+
+@pytest.mark.parametrize('skills', ["python", ["python", 3], [["python"]], {"python": 1}])
+def test_rejects_skills_that_are_not_a_list_of_names(client, skills):
+    response = client.post('/api/search', json={'job_description': JD, 'skills': skills})
+    assert response.status_code == 400
+
+
+def test_rejects_unknown_skills(client):
+    response = client.post('/api/search', json={'job_description': JD, 'skills': ["python", "cobol-ish"]})
+    assert response.status_code == 400
+    assert "cobol-ish" in response.get_json()['error']
+
+
+def test_accepts_aliases_and_any_case(client):
+    response = client.post('/api/search', json={'job_description': JD, 'skills': ["ML", "Python", "JS"]})
+    assert response.status_code == 200
+    assert response.get_json()['results'] == []
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from ml_logic import TAXONOMY_PATH, clean_text
+from skill_matcher import SkillMatcher
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return SkillMatcher.from_file(TAXONOMY_PATH)
+
+
+def find(matcher, text):
+    return matcher.find(clean_text(text))
+
+
+def test_whole_tokens_only(matcher):
+    assert find(matcher, "Built single-page apps in JavaScript") == ['javascript']
+    assert 'java' not in find(matcher, "JavaScript and TypeScript")
+    assert find(matcher, "Java and JavaScript") == ['java', 'javascript']
+
+
+def test_single_letter_skill_needs_its_own_token(matcher):
+    assert find(matcher, "A creative communicator who can coach cross-functional teams") == []
+    assert find(matcher, "Embedded firmware written in C") == ['c']
+
+
+def test_aliases_map_to_the_canonical_skill(matcher):
+    assert find(matcher, "5 years of ML research") == ['machine learning']
+    assert find(matcher, "Frontend work in JS and HTML5") == ['javascript', 'html']
+
+
+def test_multi_token_phrases(matcher):
+    assert find(matcher, "Applied machine learning to fraud detection") == ['machine learning']
+    assert find(matcher, "Operated the machine and kept learning") == []
+
+
+def test_results_follow_taxonomy_order():
+    matcher = SkillMatcher({"sql": [], "python": [], "k-nearest neighbors": ["knn"]})
+    assert matcher.find("python k nearest neighbors and sql".split()) == ['sql', 'python', 'k-nearest neighbors']
+    assert matcher.find("knn") == ['k-nearest neighbors']
+
+
+def test_from_file_accepts_a_plain_list(tmp_path):
+    path = tmp_path / 'skills.json'
+    path.write_text(json.dumps(["docker", "kubernetes"]), encoding='utf-8')
+    matcher = SkillMatcher.from_file(path)
+    assert matcher.find("docker on kubernetes") == ['docker', 'kubernetes']
+    assert matcher.digest == SkillMatcher({"docker": [], "kubernetes": []}).digest
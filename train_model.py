@@ -1,18 +1,31 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-import pickle
+import argparse
+import json
+import math
 import os
+import pickle
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 
-def train_and_save():
+DATASET = 'job_applicant_dataset.csv'
+TEXT_COLUMNS = ['Resume', 'Job Description']
+LABEL_COLUMN = 'Best Match'
+MAX_FEATURES = 5000
+
+def train_and_save(path=DATASET, out_dir='models'):
     # Load your dataset
-    df = pd.read_csv('job_applicant_dataset.csv')
+    df = pd.read_csv(path)
     
     # We learn the relationship between Resume + JD and the 'Best Match' label
     df['combined_text'] = df['Resume'].fillna('') + " " + df['Job Description'].fillna('')
     
     # Initialize Vectorizer
-    tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
+    tfidf = TfidfVectorizer(stop_words='english', max_features=MAX_FEATURES)
     X = tfidf.fit_transform(df['combined_text'])
     y = df['Best Match']
     
@@ -20,17 +33,281 @@ def train_and_save():
     model = LogisticRegression()
     model.fit(X, y)
     
+    save_artifacts(model, tfidf, out_dir)
+
+def save_artifacts(model, tfidf, out_dir='models'):
     # Create models directory if it doesn't exist
-    if not os.path.exists('models'):
-        os.makedirs('models')
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    # Invalidate an earlier export first: the app serves it for as long as meta.json exists
+    stale_meta = os.path.join(out_dir, 'ats_artifacts', 'meta.json')
+    if os.path.exists(stale_meta):
+        os.remove(stale_meta)
         
     # Save the artifacts
-    with open('models/ats_model.pkl', 'wb') as f:
+    with open(os.path.join(out_dir, 'ats_model.pkl'), 'wb') as f:
         pickle.dump(model, f)
-    with open('models/vectorizer.pkl', 'wb') as f:
+    with open(os.path.join(out_dir, 'vectorizer.pkl'), 'wb') as f:
         pickle.dump(tfidf, f)
         
-    print("Success: models/ats_model.pkl and models/vectorizer.pkl created.")
+    print(f"Success: {out_dir}/ats_model.pkl and {out_dir}/vectorizer.pkl created.")
+    if hasattr(tfidf, 'vocabulary_'):
+        export_artifacts(model, tfidf, os.path.join(out_dir, 'ats_artifacts'))
+    else:
+        print("Note: a hashing vectorizer cannot be exported; the app will load the pickles.")
+
+def export_artifacts(model, tfidf, out_dir='models/ats_artifacts'):
+    """Writes the vectorizer + model as plain NumPy arrays that ml_logic.MmapTfidf memory-maps.
+
+    vocab_terms.npy  sorted fixed-width unicode terms (binary search replaces the vocabulary dict)
+    vocab_index.npy  column of each sorted term
+    idf.npy          float64 IDF weights per column
+    coef.npy / intercept.npy / classes.npy   the linear model
+    meta.json        analyzer settings needed to tokenize exactly like sklearn
+
+    Running workers memory-map these files, so nothing is rewritten in place:
+    each file is written to a temporary name and swapped in with os.replace
+    (old maps keep the old inode), meta.json last.
+    """
+    if tfidf.analyzer != 'word' or tfidf.tokenizer is not None or tfidf.preprocessor is not None \
+            or tfidf.strip_accents is not None:
+        raise ValueError("Only the default word analyzer can be exported.")
+    if np.dtype(tfidf.dtype) != np.float64:
+        raise ValueError("Only float64 vectorizers can be exported (MmapTfidf computes in float64).")
+    os.makedirs(out_dir, exist_ok=True)
+
+    terms = sorted(tfidf.vocabulary_)
+    stop_words = tfidf.get_stop_words()
+    arrays = {
+        'vocab_terms.npy': np.array(terms),
+        'vocab_index.npy': np.array([tfidf.vocabulary_[t] for t in terms], dtype=np.int32),
+        'idf.npy': np.asarray(tfidf.idf_ if tfidf.use_idf else [], dtype=np.float64),
+        'coef.npy': np.ascontiguousarray(model.coef_, dtype=np.float64),
+        'intercept.npy': np.asarray(model.intercept_, dtype=np.float64),
+        'classes.npy': np.asarray(model.classes_),
+    }
+    staged = []
+    for name, array in arrays.items():
+        tmp = os.path.join(out_dir, f'.{name}.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+        staged.append((tmp, os.path.join(out_dir, name)))
+    meta = {
+        "format": 1,
+        "n_features": len(terms),
+        "lowercase": tfidf.lowercase,
+        "token_pattern": tfidf.token_pattern,
+        "stop_words": sorted(stop_words) if stop_words else None,
+        "ngram_range": list(tfidf.ngram_range),
+        "norm": tfidf.norm,
+        "binary": tfidf.binary,
+        "use_idf": tfidf.use_idf,
+        "sublinear_tf": tfidf.sublinear_tf,
+    }
+    tmp = os.path.join(out_dir, '.meta.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    # meta.json last: the app only switches to the export once it is complete
+    staged.append((tmp, os.path.join(out_dir, 'meta.json')))
+    for tmp, path in staged:
+        os.replace(tmp, path)
+    print(f"Success: memory-mappable artifacts exported to {out_dir}/")
+
+# --- STREAMING (OUT-OF-CORE) TRAINING ---
+
+def iter_chunks(path, chunk_size, holdout_every=0, holdout=False):
+    """Yields (texts, labels) per CSV chunk without loading the file.
+
+    With holdout_every=N every N-th row is held out for evaluation: holdout=False
+    yields the training rows, holdout=True only the held-out ones.
+    """
+    offset = 0
+    for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=TEXT_COLUMNS + [LABEL_COLUMN]):
+        texts = (chunk['Resume'].fillna('') + " " + chunk['Job Description'].fillna('')).tolist()
+        labels = chunk[LABEL_COLUMN].to_numpy()
+        if holdout_every:
+            mask = (np.arange(offset, offset + len(chunk)) % holdout_every) == 0
+            keep = mask if holdout else ~mask
+            texts = [t for t, k in zip(texts, keep) if k]
+            labels = labels[keep]
+        offset += len(chunk)
+        if len(texts):
+            yield texts, labels
+
+_worker_vectorizer = None
+
+def _init_worker(vectorizer):
+    global _worker_vectorizer
+    _worker_vectorizer = vectorizer
+
+def _featurize(batch):
+    texts, labels = batch
+    return _worker_vectorizer.transform(texts), labels
+
+def _count_terms(texts):
+    # document frequency and total term frequency of one chunk (pass 1 of the two-pass vocabulary)
+    analyze = TfidfVectorizer(stop_words='english').build_analyzer()
+    df, tf = Counter(), Counter()
+    for text in texts:
+        tokens = analyze(text)
+        tf.update(tokens)
+        df.update(set(tokens))
+    return df, tf, len(texts)
+
+def build_vocabulary(path, chunk_size, holdout_every, workers, max_features=MAX_FEATURES):
+    """Pass 1: a TfidfVectorizer equal to fit() on the training rows, built from chunked counts."""
+    df, tf, n_docs = Counter(), Counter(), 0
+
+    def merge(future):
+        nonlocal n_docs
+        chunk_df, chunk_tf, n = future.result()
+        df.update(chunk_df)
+        tf.update(chunk_tf)
+        n_docs += n
+
+    # Same bounded window as train_streaming (Executor.map would queue every chunk up front)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = []
+        for texts, _ in iter_chunks(path, chunk_size, holdout_every):
+            pending.append(pool.submit(_count_terms, texts))
+            if len(pending) >= 2 * workers:
+                merge(pending.pop(0))
+        while pending:
+            merge(pending.pop(0))
+
+    # Same selection as CountVectorizer._limit_features (including how argsort breaks ties)
+    all_terms = sorted(tf)
+    tfs = np.array([tf[t] for t in all_terms], dtype=np.int64)
+    keep = sorted(all_terms[i] for i in (-tfs).argsort()[:max_features])
+    vocabulary = {t: i for i, t in enumerate(keep)}
+    tfidf = TfidfVectorizer(stop_words='english', vocabulary=vocabulary)
+    tfidf.fit([" ".join(vocabulary)])
+    tfidf.idf_ = np.array([math.log((1 + n_docs) / (1 + df[t])) + 1 for t in vocabulary])
+    return tfidf
+
+def _save_checkpoint(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(tmp, path)  # atomic: a crash never leaves a half-written checkpoint
+
+def train_streaming(path=DATASET, chunk_size=5000, vocab='two-pass', epochs=1, workers=None,
+                    holdout_every=0, checkpoint=None, checkpoint_every=10, resume=False):
+    """Out-of-core trainer: chunked CSV, fixed vocabulary, SGD logistic regression via partial_fit.
+
+    Featurization runs in a process pool (at most 2 chunks per worker in flight,
+    so memory stays bounded) while the main process feeds partial_fit in order.
+    """
+    workers = workers or os.cpu_count() or 1
+    state = None
+    if resume and checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint, 'rb') as f:
+            state = pickle.load(f)
+        print(f"Resuming from epoch {state['epoch']}, chunk {state['chunk']}")
+
+    if state is None:
+        if vocab == 'hashing':
+            # Stateless: no vocabulary pass at all (tf weights, no idf)
+            vectorizer = HashingVectorizer(stop_words='english', n_features=2 ** 18,
+                                           alternate_sign=False, norm='l2')
+        else:
+            vectorizer = build_vocabulary(path, chunk_size, holdout_every, workers)
+        model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=0)
+        state = {"vectorizer": vectorizer, "model": model, "classes": None,
+                 "epoch": 0, "chunk": 0, "rows": 0}
+
+    if state["classes"] is None:
+        labels = set()
+        for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=[LABEL_COLUMN]):
+            labels.update(chunk[LABEL_COLUMN].dropna().unique().tolist())
+        state["classes"] = np.array(sorted(labels))
+
+    vectorizer, model = state["vectorizer"], state["model"]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(vectorizer,)) as pool:
+        for epoch in range(state["epoch"], epochs):
+            chunks = iter_chunks(path, chunk_size, holdout_every)
+            for _ in range(state["chunk"]):
+                next(chunks, None)  # already trained before the checkpoint
+
+            pending = []
+            for batch in chunks:
+                pending.append(pool.submit(_featurize, batch))
+                if len(pending) >= 2 * workers:
+                    _fit_next(pending, model, state, checkpoint, checkpoint_every)
+            while pending:
+                _fit_next(pending, model, state, checkpoint, checkpoint_every)
+            state["epoch"], state["chunk"] = epoch + 1, 0
+            print(f"Epoch {epoch + 1}/{epochs} done, {state['rows']} rows seen")
+            if checkpoint:
+                _save_checkpoint(checkpoint, state)
+    return model, vectorizer
+
+def _fit_next(pending, model, state, checkpoint, checkpoint_every):
+    X, y = pending.pop(0).result()
+    model.partial_fit(X, y, classes=state["classes"])
+    state["chunk"] += 1
+    state["rows"] += len(y)
+    if checkpoint and state["chunk"] % checkpoint_every == 0:
+        _save_checkpoint(checkpoint, state)
+
+def evaluate(model, vectorizer, path, chunk_size, holdout_every):
+    correct = total = 0
+    for texts, labels in iter_chunks(path, chunk_size, holdout_every, holdout=True):
+        correct += int((model.predict(vectorizer.transform(texts)) == labels).sum())
+        total += len(labels)
+    return correct / total if total else None
+
+def compare(path, chunk_size, vocab, workers, holdout_every=5):
+    """Accuracy and wall time of the batch trainer vs the streaming trainer on the same holdout."""
+    report = {"dataset": path, "holdout": f"every {holdout_every}th row"}
+
+    start = time.perf_counter()
+    texts, labels = [], []
+    for t, y in iter_chunks(path, chunk_size, holdout_every):
+        texts.extend(t)
+        labels.extend(y.tolist())
+    tfidf = TfidfVectorizer(stop_words='english', max_features=MAX_FEATURES)
+    model = LogisticRegression().fit(tfidf.fit_transform(texts), labels)
+    report["batch"] = {"seconds": round(time.perf_counter() - start, 2),
+                       "accuracy": evaluate(model, tfidf, path, chunk_size, holdout_every)}
+    del texts, labels
+
+    start = time.perf_counter()
+    model, vectorizer = train_streaming(path, chunk_size, vocab, epochs=3, workers=workers,
+                                        holdout_every=holdout_every)
+    report["streaming"] = {"seconds": round(time.perf_counter() - start, 2), "vocab": vocab,
+                           "accuracy": evaluate(model, vectorizer, path, chunk_size, holdout_every)}
+    return report
 
 if __name__ == "__main__":
-    train_and_save()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the ATS model and vectorizer.")
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--streaming', action='store_true', help='out-of-core training for large datasets')
+    parser.add_argument('--vocab', choices=['two-pass', 'hashing'], default='two-pass')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None, help='featurization processes (default: all cores)')
+    parser.add_argument('--checkpoint', default='models/train_checkpoint.pkl')
+    parser.add_argument('--resume', action='store_true', help='continue from --checkpoint')
+    parser.add_argument('--compare', action='store_true', help='report batch vs streaming accuracy and time')
+    parser.add_argument('--output-dir', default='models')
+    parser.add_argument('--export', action='store_true',
+                        help='only export the existing pickles in --output-dir to the memory-mappable format')
+    args = parser.parse_args()
+
+    if args.export:
+        with open(os.path.join(args.output_dir, 'ats_model.pkl'), 'rb') as f:
+            model = pickle.load(f)
+        with open(os.path.join(args.output_dir, 'vectorizer.pkl'), 'rb') as f:
+            tfidf = pickle.load(f)
+        export_artifacts(model, tfidf, os.path.join(args.output_dir, 'ats_artifacts'))
+    elif args.compare:
+        print(json.dumps(compare(args.data, args.chunk_size, args.vocab, args.workers), indent=2))
+    elif args.streaming:
+        os.makedirs(os.path.dirname(args.checkpoint) or '.', exist_ok=True)
+        model, vectorizer = train_streaming(args.data, args.chunk_size, args.vocab, args.epochs, args.workers,
+                                            checkpoint=args.checkpoint, resume=args.resume)
+        save_artifacts(model, vectorizer, args.output_dir)
+    else:
+        train_and_save(args.data, args.output_dir)
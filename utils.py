@@ -1,59 +1,215 @@
 import os
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from fpdf import FPDF
 import fitz
+import metrics
+from cache import LRUCache, SQLiteStore, TieredCache
+from config import Config
 
-def extract_text_from_pdf(path):
-    text = ""
+logger = logging.getLogger(__name__)
+
+def _open_pdf(source):
+    # `source` is either a path on disk or the raw PDF bytes
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def _read_pages(doc, start, stop, max_chars=None):
+    parts, n = [], 0
+    for i in range(start, stop):
+        t = doc.load_page(i).get_text()
+        parts.append(t)
+        n += len(t)
+        if max_chars and n >= max_chars:
+            break
+    return parts
+
+def _extract_page_range(source, start, stop, max_chars=None):
+    """Text of pages [start, stop), stopping early at max_chars. Runs in a pool worker."""
+    with _open_pdf(source) as doc:
+        return _read_pages(doc, start, stop, max_chars)
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+def _get_page_pool():
+    global _page_pool
+    # Request threads race here on the first large upload; only one may spawn the pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                ctx = multiprocessing.get_context('spawn')
+                _page_pool = ProcessPoolExecutor(Config.PDF_EXTRACT_WORKERS, mp_context=ctx)
+    return _page_pool
+
+def extract_pdf(source, max_pages=None, max_chars=None, parallel_threshold=None):
+    """Extracts text from a PDF path or bytes, capped at max_pages / max_chars.
+
+    Documents with at least `parallel_threshold` pages are split into page ranges
+    and spread over a process pool (PyMuPDF holds the GIL, so threads would not
+    help). Returns a dict with the text, page counts, timing and any error.
+    """
+    max_pages = Config.PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = Config.PDF_MAX_CHARS if max_chars is None else max_chars
+    parallel_threshold = Config.PDF_PARALLEL_PAGES if parallel_threshold is None else parallel_threshold
+    started = time.perf_counter()
+    out = {"text": "", "pages": 0, "pages_read": 0, "truncated": False, "seconds": 0.0, "error": None}
+    parts = []
     try:
-        doc = fitz.open(path)
-        for page in doc: text += page.get_text()
-        doc.close()
-    except: pass
-    return text
+        with metrics.timed('pdf_extract'), _open_pdf(source) as doc:
+            out["pages"] = doc.page_count
+            n_pages = min(doc.page_count, max_pages) if max_pages else doc.page_count
+            # pool workers of the job queue never fan out again
+            in_worker = multiprocessing.parent_process() is not None
+            if n_pages < parallel_threshold or Config.PDF_EXTRACT_WORKERS < 2 or in_worker:
+                parts = _read_pages(doc, 0, n_pages, max_chars)
+            else:
+                parts = _extract_parallel(source, n_pages, max_chars)
+    except Exception as e:
+        logger.warning("PDF extraction failed: %s", e)
+        out["error"] = str(e) or e.__class__.__name__
+        metrics.inc('ats_pdf_errors_total')
 
-import os
-from werkzeug.utils import secure_filename
+    text = "".join(parts)
+    out["pages_read"] = len(parts)
+    out["truncated"] = out["pages_read"] < out["pages"] or bool(max_chars and len(text) > max_chars)
+    out["text"] = text[:max_chars] if max_chars else text
+    out["seconds"] = time.perf_counter() - started
+    if out["pages"]:
+        metrics.observe('ats_pdf_pages', out["pages"], buckets=metrics.PAGE_BUCKETS)
+    logger.debug("Extracted %d/%d pages (%d chars) in %.3fs",
+                 out["pages_read"], out["pages"], len(out["text"]), out["seconds"])
+    return out
+
+def _extract_parallel(source, n_pages, max_chars):
+    pool = _get_page_pool()
+    chunk = max(1, -(-n_pages // Config.PDF_EXTRACT_WORKERS))
+    futures = [pool.submit(_extract_page_range, source, start, min(start + chunk, n_pages), max_chars)
+               for start in range(0, n_pages, chunk)]
+    parts, n = [], 0
+    for i, f in enumerate(futures):
+        chunk_parts = f.result()
+        parts.extend(chunk_parts)
+        n += sum(len(t) for t in chunk_parts)
+        if max_chars and n >= max_chars:
+            for rest in futures[i + 1:]:
+                rest.cancel()
+            break
+    return parts
+
+class PDFExtractionError(ValueError):
+    pass
+
+def extract_text_from_pdf(source):
+    """Text of a PDF path or bytes; raises PDFExtractionError if PyMuPDF cannot read it."""
+    extracted = extract_pdf(source)
+    if extracted["error"]:
+        raise PDFExtractionError(f"Could not read this PDF: {extracted['error']}")
+    return extracted["text"]
 
-def save_upload(file, folder):
-    # 1. Check if the file actually exists
+# Extracted text keyed by the SHA-256 of the PDF bytes: memory LRU in front of a SQLite table
+pdf_text_cache = TieredCache(
+    LRUCache(Config.PDF_CACHE_ENTRIES, max_bytes=Config.PDF_CACHE_BYTES, sizeof=len),
+    SQLiteStore(Config.CACHE_DB_PATH, 'pdf_text', max_rows=Config.PDF_CACHE_ROWS)
+)
+
+def pdf_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def extract_text_cached(data):
+    """Extracts text from in-memory PDF bytes; repeat uploads skip PyMuPDF entirely.
+
+    Raises PDFExtractionError when PyMuPDF cannot read the upload, so a corrupt
+    file is rejected instead of being scored as an empty resume.
+    """
+    key = pdf_digest(data)
+    text = pdf_text_cache.get(key)
+    metrics.inc('ats_cache_events_total', cache='pdf_text', result='miss' if text is None else 'hit')
+    if text is None:
+        text = extract_text_from_pdf(data)
+        if text:
+            pdf_text_cache.put(key, text)
+    return text
+
+def read_upload(file):
+    # Uploads are read into memory, never written to disk
     if not file or file.filename == '':
         return None
-    
-    # 2. Check extension (Fixes the Google Drive generic MIME type issue)
-    allowed_ext = file.filename.lower().endswith('.pdf')
-    if not allowed_ext:
+    if not file.filename.lower().endswith('.pdf'):
         return None
+    data = file.read()
+    return data or None
+
+def iter_zip_pdfs(stream, max_files, max_member_bytes):
+    """Yields (name, pdf_bytes, error) for each PDF member of a ZIP archive.
 
-    # 3. Ensure the folder exists
-    if not os.path.exists(folder):
-        os.makedirs(folder)
-    
-    # 4. Clean the filename (removes spaces/special characters)
-    # This is very important for Linux servers like Render
-    filename = secure_filename(file.filename)
-    path = os.path.join(folder, filename)
-    
-    # 5. Save the file
-    file.save(path)
-    return path
-
-def generate_resume_pdf(data, file_path):
+    Members are decompressed one at a time straight from the (seekable) upload
+    stream, never to disk, so only one resume is held in memory per step.
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+    except (zipfile.BadZipFile, OSError):
+        yield None, None, "Not a valid ZIP archive."
+        return
+    with archive:
+        count = 0
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('.'):
+                continue
+            if not name.lower().endswith('.pdf'):
+                yield name, None, "Skipped: not a PDF."
+                continue
+            count += 1
+            if count > max_files:
+                yield name, None, f"Skipped: archive holds more than {max_files} PDFs."
+                continue
+            if info.file_size > max_member_bytes:
+                yield name, None, "Skipped: file too large."
+                continue
+            try:
+                data = archive.read(info)
+            except (zipfile.BadZipFile, RuntimeError, OSError, NotImplementedError) as e:
+                yield name, None, f"Unreadable member: {e}"
+                continue
+            yield name, data, None
+
+# Builder rendering: font metrics for the core "Arial" font live in fpdf's module-level
+# cache, so only the per-render work below is repeated; identical forms hit the cache.
+_LATIN1_FIXES = str.maketrans({'•': '-', '–': '-'})
+RESUME_SECTIONS = [
+    ("PROFESSIONAL SUMMARY", 'summary'), ("WORK EXPERIENCE", 'experience'),
+    ("PROJECTS", 'projects'), ("EDUCATION", 'education'),
+    ("TECHNICAL SKILLS", 'skills'), ("CERTIFICATIONS", 'certifications'),
+    ("ACHIEVEMENTS", 'achievements')
+]
+
+resume_render_cache = LRUCache(Config.RENDER_CACHE_ENTRIES, max_bytes=Config.RENDER_CACHE_BYTES, sizeof=len)
+
+# Clean non-latin-1 characters
+def _latin1(t):
+    if not t: return ""
+    return t.translate(_LATIN1_FIXES).encode('latin-1', 'ignore').decode('latin-1')
+
+def generate_resume_pdf(data):
+    """Renders the builder form into PDF bytes in memory. Returns None on failure."""
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
         pdf = FPDF()
         pdf.set_auto_page_break(auto=True, margin=15)
         pdf.add_page()
-        
-        # Clean non-latin-1 characters
-        def clean(t):
-            if not t: return ""
-            return t.replace('•', '-').replace('–', '-').encode('latin-1', 'ignore').decode('latin-1')
 
         # Header
         pdf.set_font("Arial", 'B', 16)
-        pdf.cell(0, 10, clean(data.get('full_name', 'Resume')).upper(), ln=True, align='C')
+        pdf.cell(0, 10, _latin1(data.get('full_name', 'Resume')).upper(), ln=True, align='C')
         pdf.set_font("Arial", '', 10)
-        pdf.cell(0, 5, clean(f"{data.get('email')} | {data.get('phone')} | {data.get('location')}"), ln=True, align='C')
+        pdf.cell(0, 5, _latin1(f"{data.get('email')} | {data.get('phone')} | {data.get('location')}"), ln=True, align='C')
         pdf.ln(8)
 
         def add_formatted_section(title, key):
@@ -67,7 +223,7 @@ def generate_resume_pdf(data, file_path):
                 pdf.set_font("Arial", '', 10)
                 lines = content.split('\n')
                 for line in lines:
-                    c_line = clean(line.strip())
+                    c_line = _latin1(line.strip())
                     if not c_line:
                         pdf.ln(2) # Handles double enter spacing
                         continue
@@ -79,17 +235,23 @@ def generate_resume_pdf(data, file_path):
                     pdf.multi_cell(0, 5, c_line)
                 pdf.ln(4)
 
-        sections = [
-            ("PROFESSIONAL SUMMARY", 'summary'), ("WORK EXPERIENCE", 'experience'),
-            ("PROJECTS", 'projects'), ("EDUCATION", 'education'),
-            ("TECHNICAL SKILLS", 'skills'), ("CERTIFICATIONS", 'certifications'),
-            ("ACHIEVEMENTS", 'achievements')
-        ]
-        for t, k in sections: add_formatted_section(t, k)
+        for t, k in RESUME_SECTIONS: add_formatted_section(t, k)
 
-        pdf.output(file_path)
-        return True
+        out = pdf.output(dest='S')
+        # fpdf 1.x returns a latin-1 str, fpdf2 a bytearray
+        return out.encode('latin-1') if isinstance(out, str) else bytes(out)
     except Exception as e:
-        print(f"Error: {e}")
+        logger.warning("Resume rendering failed: %s", e)
+        return None
 
-        return False
+def render_resume_cached(data):
+    """generate_resume_pdf through a bounded cache keyed by a hash of the form data."""
+    key = hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+    pdf_bytes = resume_render_cache.get(key)
+    metrics.inc('ats_cache_events_total', cache='resume_render', result='miss' if pdf_bytes is None else 'hit')
+    if pdf_bytes is None:
+        with metrics.timed('pdf_render'):
+            pdf_bytes = generate_resume_pdf(data)
+        if pdf_bytes:
+            resume_render_cache.put(key, pdf_bytes)
+    return pdf_bytes